@@ -1,19 +1,64 @@
-from pydantic_settings import BaseSettings
+from functools import lru_cache
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class Settings(BaseSettings):
+    model_config = SettingsConfigDict(
+        env_file=".env",  # used only for local development when running without Docker
+        frozen=True,
+        extra="ignore",
+    )
+
     OPENAI_API_KEY: str
     QDRANT_URL: str
     RUST_SERVICE_URL: str
     QDRANT_COLLECTION_NAME: str = "documents"
+    # gRPC needs Qdrant's gRPC port (6334) reachable, so it's opt-in
+    QDRANT_PREFER_GRPC: bool = False
+    QDRANT_GRPC_PORT: int = 6334
+    QDRANT_TIMEOUT: int = 60  # Seconds per request
+
+    # Embedding request limits (shared by all concurrent uploads in a process)
+    OPENAI_EMBED_CONCURRENCY: int = 5
+    OPENAI_EMBED_RPM: int = 3000
+    EMBEDDING_CACHE_SIZE: int = 1000  # Vectors kept in the in-process LRU cache
+    # Qdrant collection persisting embeddings by content hash across uploads
+    EMBEDDING_CACHE_COLLECTION: str = "embedding_cache"
+
+    # /search response cache (exact query match, then embedding similarity)
+    QUERY_CACHE_SIZE: int = 1024
+    QUERY_CACHE_TTL_SECONDS: float = 300.0
+    # ada-002 scores unrelated text around 0.7-0.8, so keep this strict
+    QUERY_CACHE_SIMILARITY: float = 0.97
+
+    # Send a throwaway embeddings request at startup to open the connection
+    WARM_UP_OPENAI: bool = False
+
+    # Weight re-ranker keyword matches by term rarity
+    ENABLE_IDF_RERANK: bool = True
+
+    # Search extra paraphrases of each query and fuse the results (adds one
+    # chat completion per uncached query)
+    QUERY_EXPANSION: bool = False
+    QUERY_EXPANSION_VARIANTS: int = 2
 
     # Chat completion settings
     OPENAI_CHAT_MODEL: str = "gpt-4o"
     MAX_SUMMARY_TOKENS: int = 500
     SUMMARY_TEMPERATURE: float = 0.3
+    # Token budget for the chunks placed in a summary prompt (gpt-4o has 128k)
+    SUMMARY_CONTEXT_TOKENS: int = 100_000
+
+    # Upload chunking settings (sizes are in words)
+    CHUNK_TARGET_WORDS: int = 250
+    CHUNK_MIN_WORDS: int = 80
+    CHUNK_OVERLAP_WORDS: int = 40
+
 
-    class Config:
-        env_file = ".env"  # used only for local development when running without Docker
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Return the process-wide settings, parsing the environment only once."""
+    return Settings()
 
 
-settings = Settings()
+settings = get_settings()
@@ -1,9 +1,85 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from routes import health, config_routes, upload, search, summarize
+from services import embedding, openai_client, rust_bridge
+from services.idf_store import idf_store
+from services.qdrant_service import bootstrap_collection, client
+from services.rust_bridge import re_rank_results
+from config import settings
+from utils.logging_config import logger
 from prometheus_fastapi_instrumentator import Instrumentator
 
 
-app = FastAPI()
+async def warm_up_services() -> None:
+    """
+    Send one throwaway request to the Rust re-ranker (and, with WARM_UP_OPENAI,
+    to OpenAI embeddings) so connection setup happens before the first real
+    search. Best-effort: a failure here only means the first request pays that
+    cost instead.
+    """
+    warm_ups = {
+        "Rust re-ranker": re_rank_results(
+            query="warmup",
+            results=[{"id": "0", "score": 1.0, "payload": {"text": "warmup"}}],
+            limit=1,
+            threshold=0.0,
+        )
+    }
+    # A billed API call, so opt-in (it would run on every --reload restart)
+    if settings.WARM_UP_OPENAI:
+        warm_ups["OpenAI embeddings"] = embedding.get_embedding("warmup", max_retries=1)
+    outcomes = await asyncio.gather(*warm_ups.values(), return_exceptions=True)
+    for service, outcome in zip(warm_ups, outcomes):
+        if isinstance(outcome, Exception):
+            logger.warning(f"{service} warm-up failed: {outcome}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load the tokenizer up front so the first upload doesn't pay for it. A cold
+    # load downloads the BPE ranks; if that fails, uploads retry it lazily and
+    # searches don't need it at all, so don't fail startup
+    try:
+        await asyncio.to_thread(embedding.get_encoding)
+    except Exception as e:
+        logger.warning(f"Tokenizer preload failed, will load on first use: {e}")
+    ready = await bootstrap_collection(
+        client, settings.QDRANT_COLLECTION_NAME, vector_size=1536
+    )
+    background = []
+    if ready:
+        # Scrolls the whole collection; searches fall back to per-query IDF
+        # until it finishes
+        background.append(
+            asyncio.create_task(
+                idf_store.load_from_qdrant(client, settings.QDRANT_COLLECTION_NAME)
+            )
+        )
+        # Best-effort like the rest of startup; the first upload retries it
+        try:
+            await embedding.embedding_store.ensure_collection(client, vector_size=1536)
+        except Exception as e:
+            logger.warning(f"Could not create the embedding cache collection: {e}")
+    else:
+        # Uploads still create the collection on demand once Qdrant is up
+        logger.error(
+            f"Could not create collection '{settings.QDRANT_COLLECTION_NAME}' "
+            "at startup"
+        )
+    # In the background so an unreachable service can't hold up startup
+    background.append(asyncio.create_task(warm_up_services()))
+    yield
+    for task in background:
+        task.cancel()
+    # Release pooled connections held by shared HTTP clients
+    await openai_client.close_client()
+    await rust_bridge.close_client()
+    await client.close()
+
+
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 instrumentator = Instrumentator()
 instrumentator.instrument(app).expose(app)
 
@@ -1,15 +1,26 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, Field
 from typing import List
 
+# Characters; far below the embedding model's context window
+MAX_QUERY_LENGTH = 2000
+# HNSW beam width; search cost grows with it and recall stops improving long
+# before this
+MAX_EF = 1024
+
 
 class SearchRequest(BaseModel):
-    query: str
+    model_config = ConfigDict(frozen=True, extra="ignore")
+
+    query: str = Field(max_length=MAX_QUERY_LENGTH)
     limit: int = 10
     threshold: float = 0.7
     idf_map: dict = {}
+    ef: int | None = Field(None, ge=1, le=MAX_EF)
 
 
 class SearchResult(BaseModel):
+    model_config = ConfigDict(frozen=True, extra="ignore")
+
     id: str
     text: str
     score: float
@@ -17,6 +28,8 @@ class SearchResult(BaseModel):
 
 
 class SearchResponse(BaseModel):
+    model_config = ConfigDict(frozen=True, extra="ignore")
+
     results: List[SearchResult]
     query_time_ms: int
     total_found: int
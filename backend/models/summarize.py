@@ -1,15 +1,19 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from typing import List
 from .search import SearchResult
 
 
 class SummarizeRequest(BaseModel):
+    model_config = ConfigDict(frozen=True, extra="ignore")
+
     query: str
     search_results: List[SearchResult]
     style: str = "comprehensive"
 
 
 class SummarizeResponse(BaseModel):
+    model_config = ConfigDict(frozen=True, extra="ignore")
+
     summary: str
     query_time_ms: int
     chunks_processed: int
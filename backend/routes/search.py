@@ -1,17 +1,179 @@
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import ORJSONResponse
 from utils.idf import compute_idf
 from models.search import SearchRequest, SearchResult, SearchResponse
-from services.embedding import get_embedding
-from services.qdrant_service import search_vectors, client
+from services.embedding import get_embedding, get_embeddings
+from services.openai_chat_service import (
+    create_query_expansion_messages,
+    get_chat_completion,
+    parse_query_variants,
+)
+from services.qdrant_service import (
+    batch_search,
+    quantized_search_params,
+    search_vectors,
+    client,
+)
+from services.idf_store import idf_store
+from services.query_cache import query_cache
 from services.rust_bridge import re_rank_results
 from config import settings
 from utils.logging_config import logger
 from utils.exception_handler import handle_custom_exception
+from utils.rank_fusion import reciprocal_rank_fusion
 from exceptions import QdrantSearchError
+from itertools import islice
 import time
 
 router = APIRouter()
 
+# Payload keys needed to build responses; anything else stays in Qdrant
+SEARCH_PAYLOAD_FIELDS = [
+    "text",
+    "file_name",
+    "content_type",
+    "chunk_index",
+    "word_count",
+    "chunk_type",
+]
+
+
+async def _expand_query(query: str) -> list[str]:
+    """Ask the chat model for paraphrases; expansion is best-effort."""
+    try:
+        completion = await get_chat_completion(
+            create_query_expansion_messages(query, settings.QUERY_EXPANSION_VARIANTS),
+            max_tokens=100,
+        )
+        return parse_query_variants(completion, settings.QUERY_EXPANSION_VARIANTS)
+    except Exception as e:
+        logger.warning(f"Query expansion failed, searching original query only: {e}")
+        return []
+
+
+async def _retrieve_candidates(request: SearchRequest, query_embedding) -> list[dict]:
+    """
+    Fetch re-rank candidates from Qdrant.
+
+    With QUERY_EXPANSION on, the query and its paraphrases are searched in one
+    batch request and their hit lists merged with reciprocal rank fusion.
+    """
+    candidate_limit = min(request.limit * 5, 100)
+    search_kwargs = dict(
+        client=client,
+        collection_name=settings.QDRANT_COLLECTION_NAME,
+        limit=candidate_limit,
+        score_threshold=request.threshold,
+        payload_fields=SEARCH_PAYLOAD_FIELDS,
+        search_params=quantized_search_params(request.ef),
+    )
+
+    variants = await _expand_query(request.query) if settings.QUERY_EXPANSION else []
+    if not variants:
+        return await search_vectors(query_vector=query_embedding, **search_kwargs)
+
+    variant_embeddings = await get_embeddings(variants)
+    result_lists = await batch_search(
+        query_vectors=[query_embedding, *variant_embeddings], **search_kwargs
+    )
+    return reciprocal_rank_fusion(result_lists)[:candidate_limit]
+
+
+def _dedupe_candidates(raw_results: list[dict]) -> list[dict]:
+    """
+    Drop hits whose chunk text repeats a higher-scoring hit (e.g. the same
+    file uploaded twice), so the re-ranker isn't sent redundant payloads.
+    Hits arrive best-first, so the first occurrence is the one kept.
+    """
+    unique: dict[str, dict] = {}
+    for result in raw_results:
+        unique.setdefault(result["payload"]["text"], result)
+    return list(unique.values())
+
+
+def _query_idf(request: SearchRequest, raw_results: list[dict]) -> dict | None:
+    """
+    Use corpus-level IDF once loaded from Qdrant, else estimate from candidates.
+
+    Returns None (the re-ranker then weights all terms equally) when IDF
+    weighting is disabled, or when only the candidate estimate is available
+    and there are too few candidates for it to mean anything.
+    """
+    if not settings.ENABLE_IDF_RERANK:
+        return None
+    if idf_store.loaded and idf_store.n_docs:
+        return idf_store.idf_for(request.query)
+    if len(raw_results) <= request.limit:
+        return None
+    return compute_idf([r["payload"]["text"] for r in raw_results])
+
+
+async def _rerank_or_fallback(
+    request: SearchRequest, raw_results: list[dict], idf_map: dict[str, float] | None
+) -> tuple[list[dict], int | None]:
+    """
+    Re-rank candidates with the Rust service, falling back to vector order.
+
+    Returns the ranked results and the re-ranker's processing time, or None
+    for the time when the fallback was used (the caller then uses its own timer).
+    """
+    try:
+        ranked_response = await re_rank_results(
+            query=request.query,
+            results=raw_results,
+            limit=request.limit,
+            idf_map=idf_map,
+            threshold=request.threshold,
+        )
+        return ranked_response["results"], ranked_response.get("processing_time_ms")
+    except Exception as e:
+        logger.error(f"Re-ranking failed: {e}")
+        return raw_results[: request.limit], None
+
+
+# Minimal, safe metadata fields to expose by default
+METADATA_WHITELIST = frozenset(
+    {
+        "file_name",
+        "content_type",
+        "chunk_index",
+        "word_count",
+        "chunk_type",
+    }
+)
+
+
+def _to_search_result(hit: dict, payload: dict) -> SearchResult:
+    """
+    Build one SearchResult from a ranked hit and its Qdrant payload.
+
+    Metadata always comes from the payload (the re-ranker isn't sent it);
+    re-ranked hits carry text, raw hits (re-rank fallback) only the payload.
+    Hits come from our own Qdrant + re-ranker, so skip re-validation.
+    """
+    return SearchResult.model_construct(
+        id=str(hit["id"]),
+        text=hit.get("text") or hit.get("payload", {}).get("text") or "",
+        score=hit["score"],
+        metadata={k: v for k, v in payload.items() if k in METADATA_WHITELIST},
+    )
+
+
+def _build_results(
+    ranked_results: list[dict], payload_by_id: dict[str, dict], limit: int
+) -> list[SearchResult]:
+    """Turn ranked hits into SearchResults, enriching metadata from payloads."""
+    results = []
+    for hit in islice(ranked_results, limit):
+        payload = payload_by_id.get(str(hit["id"])) or {}
+        results.append(_to_search_result(hit, payload))
+    return results
+
+
+def _cached_response(cached: dict, start_ns: int) -> ORJSONResponse:
+    query_time_ms = (time.perf_counter_ns() - start_ns) // 1_000_000
+    return ORJSONResponse({**cached, "query_time_ms": query_time_ms})
+
 
 @router.post("/search", response_model=SearchResponse)
 async def search_documents(request: SearchRequest):
@@ -24,16 +186,25 @@ async def search_documents(request: SearchRequest):
         capped at 100).
     - threshold: Minimum vector similarity score for candidate retrieval
         and filtering.
+    - ef: Optional HNSW beam width (defaults to 128). Raise it for better
+        recall, lower it for faster queries.
 
     Internals:
-    - idf_map: Computed from candidates via utils.idf.compute_idf and passed
-        to the re-ranker to boost rare terms.
+    - idf_map: Corpus-level IDF of the query terms (services.idf_store),
+        passed to the re-ranker to boost rare terms. Falls back to
+        utils.idf.compute_idf over the candidates until the corpus counts
+        have loaded (or if loading them failed),
+        and is skipped (None) when ENABLE_IDF_RERANK is off or that fallback
+        would only see request.limit candidates or fewer.
+    - Responses are cached per (limit, threshold, ef). A repeated query is
+        answered before embedding; a near-duplicate one (by embedding
+        similarity) is answered before the Qdrant lookup.
 
     Returns:
     - SearchResponse with:
         - results: list of {id, text, score, metadata}
         - query_time_ms: processing time in ms
-        - total_found: number of raw candidates found
+        - total_found: number of distinct candidates found
     """
     try:
         if not settings.QDRANT_URL:
@@ -42,86 +213,54 @@ async def search_documents(request: SearchRequest):
         if not request.query.strip():
             raise HTTPException(status_code=400, detail="Query cannot be empty")
 
-        start_time = time.time()
+        start_ns = time.perf_counter_ns()
+
+        cache_params = (request.limit, request.threshold, request.ef)
+        cached = query_cache.get(request.query, cache_params)
+        if cached is not None:
+            return _cached_response(cached, start_ns)
 
         query_embedding = await get_embedding(request.query)
 
-        raw_results = search_vectors(
-            client=client,
-            collection_name=settings.QDRANT_COLLECTION_NAME,
-            query_vector=query_embedding,
-            limit=min(request.limit * 5, 100),
-            score_threshold=request.threshold,
+        cached = query_cache.get_similar(query_embedding, cache_params)
+        if cached is not None:
+            return _cached_response(cached, start_ns)
+
+        raw_results = _dedupe_candidates(
+            await _retrieve_candidates(request, query_embedding)
         )
 
         if not raw_results:
-            return SearchResponse(results=[], query_time_ms=0, total_found=0)
+            empty = SearchResponse.model_construct(
+                results=[], query_time_ms=0, total_found=0
+            )
+            return ORJSONResponse(empty.model_dump())
 
         # Map original payloads by id for later metadata enrichment
         payload_by_id = {str(r["id"]): r.get("payload", {}) for r in raw_results}
 
-        documents = [result["payload"]["text"] for result in raw_results]
-        idf_map = compute_idf(documents)
+        idf_map = _query_idf(request, raw_results)
 
-        try:
-            ranked_response = await re_rank_results(
-                query=request.query,
-                results=raw_results,
-                limit=request.limit,
-                idf_map=idf_map,
-                threshold=request.threshold,
-            )
+        ranked_results, processing_time_ms = await _rerank_or_fallback(
+            request, raw_results, idf_map
+        )
 
-            ranked_results = ranked_response["results"]
-            processing_time_ms = ranked_response.get("processing_time_ms")
-
-        except Exception as e:
-            logger.error(f"Re-ranking failed: {e}")
-            ranked_results = raw_results[: request.limit]
-            processing_time_ms = None  # fallback to Python timer
-
-        # Minimal, safe metadata fields to expose by default
-        METADATA_WHITELIST = {
-            "file_name",
-            "content_type",
-            "chunk_index",
-            "word_count",
-            "chunk_type",
-        }
-
-        search_results = []
-        for result in ranked_results:
-            # Start with metadata from Rust (if present)
-            base_metadata = result.get("metadata", {})
-            # Merge with selected fields from the original Qdrant payload
-            original_payload = payload_by_id.get(str(result.get("id"))) or {}
-            enriched = {
-                k: v for k, v in original_payload.items() if k in METADATA_WHITELIST
-            }
-            # Rust-provided keys should win if overlaps
-            merged_metadata = {**enriched, **base_metadata}
-            # Prefer "text" field from Rust response.
-            # Fallback to payload.text for raw Qdrant items when Rust isn't used.
-            text_value = result.get("text")
-            if not text_value and "payload" in result:
-                text_value = result["payload"].get("text")
-            search_results.append(
-                SearchResult(
-                    id=str(result["id"]),
-                    text=text_value or "",
-                    score=result["score"],
-                    metadata=merged_metadata,
-                )
-            )
+        search_results = _build_results(ranked_results, payload_by_id, request.limit)
 
-        end_time = time.time()
-        fallback_ms = int((end_time - start_time) * 1000)
+        fallback_ms = (time.perf_counter_ns() - start_ns) // 1_000_000
 
-        return SearchResponse(
+        # Returning a Response directly skips FastAPI's response_model
+        # re-validation; orjson serializes the already-trusted payload
+        response = SearchResponse.model_construct(
             results=search_results,
             query_time_ms=processing_time_ms or fallback_ms,
             total_found=len(raw_results),
         )
+        payload = response.model_dump()
+        if processing_time_ms is not None:
+            # Don't pin degraded vector-order results while re-ranking is down
+            query_cache.put(request.query, cache_params, query_embedding, payload)
+        return ORJSONResponse(payload)
 
     except QdrantSearchError as e:
         raise handle_custom_exception(e)
@@ -1,18 +1,91 @@
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from models.search import SearchResult
 from models.summarize import SummarizeRequest, SummarizeResponse
 from services.openai_chat_service import (
     get_chat_completion,
+    get_chat_encoding,
     create_summary_messages,
+    stream_chat_completion,
 )
 from config import settings
 from utils.logging_config import logger
 from utils.exception_handler import handle_custom_exception
 from exceptions import QdrantSearchError
+from typing import AsyncIterator
+import orjson
 import time
 
 router = APIRouter()
 
 
+def _fit_context(results: list[SearchResult]) -> list[str]:
+    """
+    Return chunk texts that fit SUMMARY_CONTEXT_TOKENS, keeping the highest
+    scoring results when the full set would overflow the model's context.
+    """
+    budget = settings.SUMMARY_CONTEXT_TOKENS
+    # Every token spans at least one UTF-8 byte (a character can take several
+    # tokens), so this skips tokenizing the common case where everything
+    # obviously fits
+    if sum(len(result.text.encode()) for result in results) <= budget:
+        return [result.text for result in results]
+
+    # Count with the chat model's tokenizer, not the embedding model's
+    encoding = get_chat_encoding()
+    chunks = []
+    for result in sorted(results, key=lambda r: r.score, reverse=True):
+        tokens = len(encoding.encode_ordinary(result.text))
+        if tokens > budget:
+            continue
+        budget -= tokens
+        chunks.append(result.text)
+    return chunks
+
+
+def _summary_messages(request: SummarizeRequest) -> tuple[list[dict], int]:
+    """
+    Validate a summarize request and build its chat messages.
+
+    Returns:
+        The messages for the chat model and the number of chunks included.
+    """
+    if not settings.OPENAI_API_KEY:
+        raise HTTPException(status_code=500, detail="OpenAI API key is not configured")
+
+    if not request.query.strip():
+        raise HTTPException(status_code=400, detail="Query cannot be empty")
+
+    if not request.search_results:
+        raise HTTPException(
+            status_code=400, detail="No search results provided for summarization"
+        )
+
+    # Extract text chunks, dropping the lowest scoring ones if they
+    # wouldn't all fit in the prompt
+    chunks = _fit_context(request.search_results)
+    if len(chunks) < len(request.search_results):
+        logger.warning(
+            f"Kept {len(chunks)} of {len(request.search_results)} chunks "
+            "to fit the summary context budget"
+        )
+
+    logger.info(
+        f"Summarizing {len(chunks)} chunks for query: '{request.query[:100]}...'"
+    )
+
+    # Create properly formatted messages for OpenAI
+    messages = create_summary_messages(
+        query=request.query, chunks=chunks, style=request.style
+    )
+    return messages, len(chunks)
+
+
+def _sse_event(data: dict, event: str | None = None) -> bytes:
+    prefix = f"event: {event}\n".encode() if event else b""
+    return prefix + b"data: " + orjson.dumps(data) + b"\n\n"
+
+
 @router.post("/summarize", response_model=SummarizeResponse)
 async def summarize_search_results(request: SummarizeRequest):
     """
@@ -31,45 +104,22 @@ async def summarize_search_results(request: SummarizeRequest):
         - chunks_processed: Number of result chunks included in the summary.
     """
     try:
-        if not settings.OPENAI_API_KEY:
-            raise HTTPException(
-                status_code=500, detail="OpenAI API key is not configured"
-            )
-
-        if not request.query.strip():
-            raise HTTPException(status_code=400, detail="Query cannot be empty")
-
-        if not request.search_results:
-            raise HTTPException(
-                status_code=400, detail="No search results provided for summarization"
-            )
-
-        start_time = time.time()
-
-        # Extract text chunks from SearchResult objects
-        chunks = [result.text for result in request.search_results]
-
-        logger.info(
-            f"Summarizing {len(chunks)} chunks for query: '{request.query[:100]}...'"
-        )
-
-        # Create properly formatted messages for OpenAI
-        messages = create_summary_messages(
-            query=request.query, chunks=chunks, style=request.style
-        )
+        start_ns = time.perf_counter_ns()
+        messages, chunks_processed = _summary_messages(request)
 
         # Get summary from OpenAI
         summary = await get_chat_completion(messages)
 
-        end_time = time.time()
-        query_time_ms = int((end_time - start_time) * 1000)
+        query_time_ms = (time.perf_counter_ns() - start_ns) // 1_000_000
 
-        logger.info(f"Summary completed in {query_time_ms}ms for {len(chunks)} chunks")
+        logger.info(
+            f"Summary completed in {query_time_ms}ms for {chunks_processed} chunks"
+        )
 
         return SummarizeResponse(
             summary=summary,
             query_time_ms=query_time_ms,
-            chunks_processed=len(chunks),
+            chunks_processed=chunks_processed,
         )
 
     except QdrantSearchError as e:
@@ -81,3 +131,48 @@ async def summarize_search_results(request: SummarizeRequest):
         raise HTTPException(
             status_code=500, detail="Internal server error during summarization"
         )
+
+
+@router.post("/summarize/stream")
+async def stream_summary(request: SummarizeRequest):
+    """
+    Summarize search results, streaming the summary as server-sent events.
+
+    Takes the same request body as /summarize. Each event's data is a JSON
+    object: {"delta": "..."} for every piece of generated text, then a final
+    "done" event with query_time_ms and chunks_processed. A failure after the
+    stream has started is reported as an "error" event with a "detail".
+    """
+    # Validation errors are raised before streaming starts, as plain HTTP errors
+    start_ns = time.perf_counter_ns()
+    messages, chunks_processed = _summary_messages(request)
+
+    async def events() -> AsyncIterator[bytes]:
+        try:
+            async for delta in stream_chat_completion(messages):
+                yield _sse_event({"delta": delta})
+        except Exception as e:
+            logger.error(f"Streaming summarization failed: {e}")
+            detail = (
+                e.message
+                if isinstance(e, QdrantSearchError)
+                else "Internal server error during summarization"
+            )
+            yield _sse_event({"detail": detail}, event="error")
+            return
+
+        query_time_ms = (time.perf_counter_ns() - start_ns) // 1_000_000
+        logger.info(
+            f"Streamed summary in {query_time_ms}ms for {chunks_processed} chunks"
+        )
+        yield _sse_event(
+            {"query_time_ms": query_time_ms, "chunks_processed": chunks_processed},
+            event="done",
+        )
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        # Keep proxies from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
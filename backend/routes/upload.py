@@ -1,34 +1,179 @@
 from fastapi import APIRouter, File, UploadFile, HTTPException
-from starlette.status import HTTP_400_BAD_REQUEST
+from starlette.status import HTTP_400_BAD_REQUEST, HTTP_413_CONTENT_TOO_LARGE
 from utils.file_loader import extract_text
-from utils.text_cleaner import clean_text
-from utils.smart_chunker import SmartChunker, ChunkConfig
+from utils.smart_chunker import ChunkConfig, get_chunker
 from utils.exception_handler import handle_custom_exception
-from services.embedding import embed_chunks
-from services.qdrant_service import insert_vectors_batch, client, create_collection
+from services.embedding import EMBEDDING_BATCH_SIZE, embed_chunks
+from services.qdrant_service import (
+    client,
+    content_point_id,
+    create_collection,
+    existing_point_ids,
+    insert_vectors_batch,
+)
+from services.idf_store import idf_store
+from services.query_cache import query_cache
 from config import settings
 from utils.logging_config import logger
 from exceptions import QdrantSearchError
-import uuid
+import asyncio
+import io
 
 router = APIRouter()
 
+MAX_FILE_SIZE = 50 * 1024 * 1024  # 50MB
+# Chunks embedded per pipeline stage; one full OpenAI embeddings request
+PIPELINE_GROUP_SIZE = EMBEDDING_BATCH_SIZE
+# Upserts allowed in flight before embedded groups wait for Qdrant to catch up
+MAX_PENDING_INSERTS = 2
+SUPPORTED_CONTENT_TYPES = {
+    "application/pdf",
+    "text/plain",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+}
 
-def ensure_collection_exists():
+
+def _file_too_large() -> HTTPException:
+    max_size_mb = MAX_FILE_SIZE // (1024 * 1024)
+    return HTTPException(
+        status_code=HTTP_413_CONTENT_TOO_LARGE,
+        detail=f"File too large. Maximum size is {max_size_mb}MB",
+    )
+
+
+def _upload_size(file: UploadFile) -> int:
+    """Size of the already-spooled upload; Starlette sets file.size for parts."""
+    if file.size is not None:
+        return file.size
+    size = file.file.seek(0, io.SEEK_END)
+    file.file.seek(0)
+    return size
+
+
+async def ensure_collection_exists():
     """Ensure the Qdrant collection exists, create if it doesn't."""
     try:
         # Try to get collection info - this will fail if collection doesn't exist
-        client.get_collection(settings.QDRANT_COLLECTION_NAME)
+        await client.get_collection(settings.QDRANT_COLLECTION_NAME)
         logger.info(f"Collection '{settings.QDRANT_COLLECTION_NAME}' already exists")
     except Exception:
         # Collection doesn't exist, create it
         logger.info(f"Creating collection '{settings.QDRANT_COLLECTION_NAME}'")
-        create_collection(client, settings.QDRANT_COLLECTION_NAME, vector_size=1536)
+        await create_collection(
+            client, settings.QDRANT_COLLECTION_NAME, vector_size=1536
+        )
         logger.info(
             f"Collection '{settings.QDRANT_COLLECTION_NAME}' created successfully"
         )
 
 
+def _build_items(
+    chunk_group: list[dict], embedded: list[dict], file: UploadFile
+) -> list[dict]:
+    """
+    Pair embedded chunks with their chunker metadata as Qdrant items.
+
+    Items carry no id, so insert_vectors_batch derives one from the file name,
+    chunk index and chunk text: the same id _new_chunks looked up, so a chunk
+    is stored once however often its document is uploaded.
+    """
+    items = []
+    for chunk, embed_dict in zip(chunk_group, embedded):
+        chunk_metadata = chunk["metadata"]
+        items.append(
+            {
+                "embedding": embed_dict["embedding"],
+                "payload": {
+                    "text": embed_dict["chunk"],
+                    "file_name": file.filename,
+                    "content_type": file.content_type,
+                    # Enhanced metadata from semantic chunking
+                    "chunk_index": chunk_metadata.get("chunk_index"),
+                    "word_count": chunk_metadata.get(
+                        "word_count", len(embed_dict["chunk"].split())
+                    ),
+                    "chunk_type": chunk_metadata.get(
+                        "chunk_type", "standard_paragraph"
+                    ),
+                },
+            }
+        )
+    return items
+
+
+async def _new_chunks(chunk_data: list[dict], file: UploadFile) -> list[dict]:
+    """
+    Drop chunks an earlier upload of this file already stored, so they are
+    neither re-embedded nor re-written. Point ids are derived from the file
+    name, chunk index and text, so every id is known before embedding and
+    one Qdrant lookup covers the whole document.
+    """
+    ids = [
+        content_point_id(
+            {
+                "file_name": file.filename,
+                "chunk_index": chunk["metadata"].get("chunk_index"),
+                "text": chunk["text"],
+            }
+        )
+        for chunk in chunk_data
+    ]
+    existing = await existing_point_ids(client, settings.QDRANT_COLLECTION_NAME, ids)
+    return [
+        chunk for chunk, point_id in zip(chunk_data, ids) if point_id not in existing
+    ]
+
+
+async def _embed_and_insert(chunk_data: list[dict], file: UploadFile) -> list[dict]:
+    """
+    Embed chunks in groups concurrently and upsert each group as soon as its
+    embeddings arrive, so Qdrant writes overlap with OpenAI requests still in
+    flight. Returns the inserted items.
+    """
+
+    async def embed_group(start: int) -> tuple[list[dict], list[dict]]:
+        group = chunk_data[start : start + PIPELINE_GROUP_SIZE]
+        return group, await embed_chunks(
+            [chunk["text"] for chunk in group], qdrant=client
+        )
+
+    embed_tasks = [
+        asyncio.create_task(embed_group(start))
+        for start in range(0, len(chunk_data), PIPELINE_GROUP_SIZE)
+    ]
+    insert_tasks = []
+    inserted_items = []
+    try:
+        for next_group in asyncio.as_completed(embed_tasks):
+            group, embedded = await next_group
+            pending = [task for task in insert_tasks if not task.done()]
+            if len(pending) >= MAX_PENDING_INSERTS:
+                # Backpressure: don't queue unbounded upserts if Qdrant lags
+                done, _ = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    task.result()  # Surface a failed upsert now, not at the end
+            items = _build_items(group, embedded, file)
+            insert_tasks.append(
+                asyncio.create_task(
+                    insert_vectors_batch(
+                        client=client,
+                        collection_name=settings.QDRANT_COLLECTION_NAME,
+                        items=items,
+                    )
+                )
+            )
+            inserted_items.extend(items)
+        await asyncio.gather(*insert_tasks)
+    except BaseException:
+        # Don't leave other groups embedding or inserting after a failure
+        for task in (*embed_tasks, *insert_tasks):
+            task.cancel()
+        raise
+    return inserted_items
+
+
 @router.post("/upload")
 async def upload_file(file: UploadFile = File(...)):
     """
@@ -42,54 +187,45 @@ async def upload_file(file: UploadFile = File(...)):
     """
     try:
         # Ensure collection exists before processing file
-        ensure_collection_exists()
-
-        MAX_FILE_SIZE = 50 * 1024 * 1024  # 50MB
-        content = await file.read()
+        await ensure_collection_exists()
 
-        if len(content) > MAX_FILE_SIZE:
-            max_size_mb = MAX_FILE_SIZE // (1024 * 1024)
+        if file.content_type not in SUPPORTED_CONTENT_TYPES:
             raise HTTPException(
                 status_code=HTTP_400_BAD_REQUEST,
-                detail=f"File too large. Maximum size is {max_size_mb}MB",
+                detail="Unsupported file type. Please upload a PDF, TXT, or DOCX file.",
             )
 
-        if len(content) == 0:
+        # Starlette has already spooled the multipart body (to disk past 1MB);
+        # check its size and parse it in place rather than copying it again
+        file_size = _upload_size(file)
+        if file_size > MAX_FILE_SIZE:
+            raise _file_too_large()
+        if file_size == 0:
             raise HTTPException(
                 status_code=HTTP_400_BAD_REQUEST, detail="Empty file uploaded"
             )
 
-        if file.content_type not in [
-            "application/pdf",
-            "text/plain",
-            "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-        ]:
-            raise HTTPException(
-                status_code=HTTP_400_BAD_REQUEST,
-                detail="Unsupported file type. Please upload a PDF, TXT, or DOCX file.",
-            )
-
-        extracted_text = extract_text(content, file.content_type)
+        # Parsing and chunking are CPU-bound; keep them off the
+        # event loop so concurrent requests aren't stalled
+        await file.seek(0)
+        extracted_text = await asyncio.to_thread(
+            extract_text, file.file, file.content_type
+        )
         logger.info(f"Extracted {len(extracted_text)} characters from {file.filename}")
 
-        # Step 1: Use advanced semantic chunking instead of simple word-based chunking
-        cleaned_text = clean_text(
-            extracted_text, lowercase=False
-        )  # Keep case for better chunking
-
-        # Step 2: Configure chunking for better search results
+        # Step 1: Configure chunking for better search results
         chunk_config = ChunkConfig(
-            target_chunk_size=250,  # Slightly smaller for more focused results
-            min_chunk_size=80,  # Avoid tiny fragments
-            max_chunk_size=400,  # Cap very long chunks
-            overlap_size=40,  # Good context overlap
-            preserve_paragraphs=True,
-            sentence_aware=True,
+            target_chunk_size=settings.CHUNK_TARGET_WORDS,
+            min_chunk_size=settings.CHUNK_MIN_WORDS,  # Avoid tiny fragments
+            overlap_size=settings.CHUNK_OVERLAP_WORDS,  # Context overlap
         )
 
-        # Step 3: Create semantic chunks with metadata
-        chunker = SmartChunker(chunk_config)
-        chunk_data = chunker.chunk_document(cleaned_text, file.filename or "document")
+        # Step 2: Create semantic chunks with metadata. The chunker normalizes
+        # the raw text itself (NFKC, control characters, whitespace)
+        chunker = get_chunker(chunk_config)
+        chunk_data = await asyncio.to_thread(
+            chunker.chunk_document, extracted_text, file.filename or "document"
+        )
 
         if not chunk_data:
             raise HTTPException(
@@ -99,55 +235,25 @@ async def upload_file(file: UploadFile = File(...)):
 
         logger.info(f"Created {len(chunk_data)} semantic chunks from {file.filename}")
 
-        # Step 4: Extract just the text for embedding (maintain backward compatibility)
-        chunks = [chunk["text"] for chunk in chunk_data]
-        embedded_chunks = await embed_chunks(chunks)
+        # Step 3: Skip chunks a previous upload of this file already stored
+        new_chunks = await _new_chunks(chunk_data, file)
 
-        if not embedded_chunks:
-            raise HTTPException(
-                status_code=HTTP_400_BAD_REQUEST,
-                detail="No valid text chunks found for embedding.",
-            )
-
-        items_to_insert = []
-        for i, embed_dict in enumerate(embedded_chunks):
-            # Get original chunk metadata
-            chunk_metadata = chunk_data[i]["metadata"] if i < len(chunk_data) else {}
-
-            items_to_insert.append(
-                {
-                    "id": str(uuid.uuid4()),
-                    "embedding": embed_dict["embedding"],
-                    "payload": {
-                        "text": embed_dict["chunk"],
-                        "file_name": file.filename,
-                        "content_type": file.content_type,
-                        # Enhanced metadata from semantic chunking
-                        "chunk_index": chunk_metadata.get("chunk_index", i),
-                        "word_count": chunk_metadata.get(
-                            "word_count", len(embed_dict["chunk"].split())
-                        ),
-                        "chunk_type": chunk_metadata.get(
-                            "chunk_type", "standard_paragraph"
-                        ),
-                    },
-                }
-            )
-
-        insert_vectors_batch(
-            client=client,
-            collection_name=settings.QDRANT_COLLECTION_NAME,
-            items=items_to_insert,
-        )
+        # Step 4: Embed and store; Qdrant writes overlap with pending embeddings
+        inserted_items = await _embed_and_insert(new_chunks, file)
         logger.info(
-            f"Successfully inserted {len(items_to_insert)} chunks for {file.filename}"
+            f"Successfully inserted {len(inserted_items)} chunks for {file.filename}"
+            f" ({len(chunk_data) - len(new_chunks)} already stored)"
         )
+        if inserted_items:
+            idf_store.add_documents(item["payload"]["text"] for item in inserted_items)
+            # New chunks can change any query's results
+            query_cache.clear()
 
         return {
             "filename": file.filename,
             "content_type": file.content_type,
-            "size": len(content),
-            "chunks_count": len(chunks),
+            "size": file_size,
+            "chunks_count": len(chunk_data),
             "message": "File processed and embedded successfully.",
         }
 
@@ -1,16 +1,220 @@
 import asyncio
+import email.utils
+import hashlib
 import httpx
+import numpy as np
+import orjson
 import random
+import re
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from functools import lru_cache
+import tiktoken
+from qdrant_client import AsyncQdrantClient
 from config import settings
 from exceptions import EmbeddingGenerationError, OpenAIServiceError
+from services import openai_client
+from services.embedding_store import EmbeddingStore
 
-OPENAI_EMBEDDING_URL = "https://api.openai.com/v1/embeddings"
+OPENAI_EMBEDDING_PATH = "/v1/embeddings"
+EMBEDDING_MODEL = "text-embedding-ada-002"
+
+# Inputs per embeddings request (the API accepts up to 2048)
+EMBEDDING_BATCH_SIZE = 96
+# How long a query embedding waits for others to share its request
+QUERY_BATCH_DELAY = 0.005
+
+# Retry policy: exponential backoff plus jitter, stretched to the delay the
+# server asks for; both are capped at RETRY_MAX_DELAY
+RETRY_BASE_DELAY = 0.5
+RETRY_MAX_DELAY = 20.0
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+# error_code of an OpenAIServiceError for a request the API rejected (4xx)
+CLIENT_ERROR_CODE = "client_error"
+
+# Durations in x-ratelimit-reset-* headers, e.g. "1s", "6m0s", "20ms"
+_RESET_DURATION_RE = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNIT_SECONDS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+# OpenAI limits: tokens per single input, and tokens summed across one request
+MAX_INPUT_TOKENS = 8191
+MAX_BATCH_TOKENS = 300_000
+
+
+class _RateLimiter:
+    """Async token bucket capping embedding requests per minute for the process."""
+
+    def __init__(self, requests_per_minute: int):
+        self.rate = requests_per_minute / 60.0
+        self.capacity = max(1.0, self.rate)  # Allow at most ~1s worth of burst
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    async def acquire(self) -> None:
+        # Reserve a token now, letting the balance go negative, then sleep
+        # until it is earned. Each waiter gets its own slot, so wake-ups are
+        # staggered and no lock is held while sleeping (there is no await
+        # before the reservation, so it needs no lock either)
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        if self.tokens < 0:
+            try:
+                await asyncio.sleep(-self.tokens / self.rate)
+            except asyncio.CancelledError:
+                self.tokens += 1  # Give back the slot this waiter won't use
+                raise
+
+
+class _EmbeddingCache:
+    """Bounded LRU mapping content hashes to embedding vectors."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._data: OrderedDict[str, np.ndarray] = OrderedDict()
+
+    def get(self, key: str) -> np.ndarray | None:
+        vector = self._data.get(key)
+        if vector is not None:
+            self._data.move_to_end(key)
+        return vector
+
+    def put(self, key: str, vector: np.ndarray) -> None:
+        self._data[key] = vector
+        self._data.move_to_end(key)
+        if len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+
+class _QueryBatcher:
+    """
+    Coalesces single-text embedding requests into shared API calls.
+
+    The first request opens a short window; everything that arrives before it
+    closes (or until the batch is full) goes out as one embeddings request,
+    so concurrent searches for different queries cost one round trip and one
+    slot of the RPM budget instead of one each.
+    """
+
+    def __init__(self, max_batch_size: int, max_delay: float):
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self._pending: list[tuple[str, int, asyncio.Future]] = []
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    async def embed(self, text: str, max_retries: int) -> np.ndarray:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, max_retries, future))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.max_delay, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        task = asyncio.create_task(self._send(batch))
+        # Hold a reference so the task isn't garbage collected mid-flight
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, batch: list[tuple[str, int, asyncio.Future]]) -> None:
+        try:
+            vectors = await get_embeddings(
+                [text for text, _, _ in batch],
+                max_retries=max(retries for _, retries, _ in batch),
+            )
+        except OpenAIServiceError as e:
+            if e.error_code == CLIENT_ERROR_CODE and len(batch) > 1:
+                # One bad input rejects the whole request; retry each text on
+                # its own so only that caller's search fails
+                await asyncio.gather(*(self._send([entry]) for entry in batch))
+                return
+            self._fail(batch, e)
+            return
+        except Exception as e:
+            self._fail(batch, e)
+            return
+        for (_, _, future), vector in zip(batch, vectors):
+            if not future.done():
+                future.set_result(vector)
+
+    @staticmethod
+    def _fail(batch: list[tuple[str, int, asyncio.Future]], error: Exception) -> None:
+        for _, _, future in batch:
+            if not future.done():
+                future.set_exception(error)
+
+
+def _cache_key(text: str) -> str:
+    """Hash the model name together with the text so a model switch misses."""
+    return hashlib.blake2b(
+        f"{EMBEDDING_MODEL}\x00{text}".encode(), digest_size=16
+    ).hexdigest()
+
+
+# Module-level so concurrent uploads share one concurrency/RPM budget
+_embed_semaphore = asyncio.Semaphore(settings.OPENAI_EMBED_CONCURRENCY)
+_rate_limiter = _RateLimiter(settings.OPENAI_EMBED_RPM)
+_embedding_cache = _EmbeddingCache(settings.EMBEDDING_CACHE_SIZE)
+# Survives restarts and is shared by every replica, unlike the LRU above
+embedding_store = EmbeddingStore(settings.EMBEDDING_CACHE_COLLECTION, EMBEDDING_MODEL)
+# Embedding requests in flight for single query texts, so concurrent identical
+# searches share one OpenAI call instead of all missing the LRU at once
+_inflight: dict[str, asyncio.Task] = {}
+_query_batcher = _QueryBatcher(EMBEDDING_BATCH_SIZE, QUERY_BATCH_DELAY)
+
+
+def _server_retry_delay(response: httpx.Response) -> float | None:
+    """
+    Return the delay requested via Retry-After or, for a 429, the time until
+    the request limit resets (x-ratelimit-reset-requests).
+    """
+    retry_after = response.headers.get("retry-after")
+    if retry_after:
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            pass
+        try:
+            retry_at = email.utils.parsedate_to_datetime(retry_after)
+        except (TypeError, ValueError):
+            retry_at = None
+        if retry_at is not None:
+            if retry_at.tzinfo is None:
+                retry_at = retry_at.replace(tzinfo=timezone.utc)
+            return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+    # The reset header comes with every response; it only explains a 429
+    reset = response.headers.get("x-ratelimit-reset-requests")
+    if reset and response.status_code == 429:
+        parts = _RESET_DURATION_RE.findall(reset)
+        if parts:
+            return sum(float(n) * _DURATION_UNIT_SECONDS[u] for n, u in parts)
+
+    return None
+
+
+def _retry_delay(response: httpx.Response, attempt: int) -> float:
+    """Seconds to wait before retrying a failed request."""
+    backoff = RETRY_BASE_DELAY * 2**attempt
+    server_delay = _server_retry_delay(response) or 0.0
+    # A reset can be minutes away ("6m0s"); don't hold the upload that long
+    delay = min(max(server_delay, backoff), RETRY_MAX_DELAY)
+    return delay + random.uniform(0, RETRY_BASE_DELAY)
 
 
 def _extract_error_message(response: httpx.Response) -> str:
     """Extract error message from OpenAI API response."""
     try:
-        error_response = response.json()
+        error_response = orjson.loads(response.content)
         if "error" in error_response:
             return error_response["error"].get("message", "Unknown error")
     except Exception:
@@ -18,16 +222,15 @@ def _extract_error_message(response: httpx.Response) -> str:
     return response.text
 
 
-async def _make_embedding_request(text: str) -> list[float]:
-    """Make a single embedding request to OpenAI API."""
-    headers = {
-        "Authorization": f"Bearer {settings.OPENAI_API_KEY}",
-        "Content-Type": "application/json",
-    }
+async def _make_embedding_request(texts: list[str]) -> np.ndarray:
+    """
+    Make a single (batched) embedding request to OpenAI API.
 
+    Returns a contiguous float32 matrix with one unit-length row per input text.
+    """
     json_data = {
-        "model": "text-embedding-ada-002",
-        "input": text,
+        "model": EMBEDDING_MODEL,
+        "input": texts,
     }
 
     # Multiple timeout strategies for Railway connectivity issues
@@ -35,16 +238,21 @@ async def _make_embedding_request(text: str) -> list[float]:
 
     for i, timeout_val in enumerate(timeouts):
         try:
-            async with httpx.AsyncClient(
+            response = await openai_client.client.post(
+                OPENAI_EMBEDDING_PATH,
+                content=orjson.dumps(json_data),
                 timeout=httpx.Timeout(timeout=timeout_val, connect=10.0),
-                limits=httpx.Limits(max_connections=1, max_keepalive_connections=0),
-            ) as client:
-                response = await client.post(
-                    OPENAI_EMBEDDING_URL, headers=headers, json=json_data
-                )
-                response.raise_for_status()
-                data = response.json()
-                return data["data"][0]["embedding"]
+            )
+            response.raise_for_status()
+            # orjson decodes the large float arrays far faster than stdlib json
+            data = orjson.loads(response.content)
+            # The API may return items out of order; "index" maps back to the input
+            items = sorted(data["data"], key=lambda d: d["index"])
+            matrix = np.asarray([item["embedding"] for item in items], dtype=np.float32)
+            # Normalize once here so cosine comparisons downstream are plain dot
+            # products (ada-002 output is already close to unit length)
+            matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+            return matrix
         except (httpx.TimeoutException, httpx.ConnectError) as e:
             if i == len(timeouts) - 1:  # Last attempt
                 raise EmbeddingGenerationError(
@@ -57,16 +265,16 @@ async def _make_embedding_request(text: str) -> list[float]:
     raise EmbeddingGenerationError("OpenAI API request failed unexpectedly")
 
 
-async def get_embedding(text: str, max_retries: int = 3) -> list[float]:
+async def _request_embeddings(texts: list[str], max_retries: int = 3) -> np.ndarray:
     """
-    Get embedding for text using OpenAI's API.
+    Request embeddings for a batch of texts using a single OpenAI API request.
 
     Args:
-        text (str): The text to embed
+        texts (list[str]): The texts to embed (at most EMBEDDING_BATCH_SIZE)
         max_retries (int): Maximum number of retry attempts for rate limiting
 
     Returns:
-        list[float]: The embedding vector
+        np.ndarray: float32 matrix with one embedding row per input text
 
     Raises:
         HTTPException: On API errors, timeouts, or other failures
@@ -75,20 +283,25 @@ async def get_embedding(text: str, max_retries: int = 3) -> list[float]:
 
     for attempt in range(max_retries):
         try:
-            return await _make_embedding_request(text)
+            await _rate_limiter.acquire()
+            return await _make_embedding_request(texts)
 
         except httpx.HTTPStatusError as e:
             last_exception = e
-            # Handle rate limiting with exponential backoff
-            if e.response.status_code == 429 and attempt < max_retries - 1:
-                wait_time = (2**attempt) + random.uniform(0, 1)
-                await asyncio.sleep(wait_time)
+            # Retry rate limiting and transient server errors with backoff
+            if (
+                e.response.status_code in RETRYABLE_STATUS_CODES
+                and attempt < max_retries - 1
+            ):
+                await asyncio.sleep(_retry_delay(e.response, attempt))
                 continue
 
             # Handle other HTTP errors - don't retry
             error_message = _extract_error_message(e.response)
+            status_code = e.response.status_code
             raise OpenAIServiceError(
-                f"OpenAI API error: {e.response.status_code} - {error_message}"
+                f"OpenAI API error: {status_code} - {error_message}",
+                error_code=CLIENT_ERROR_CODE if 400 <= status_code < 500 else None,
             )
 
         except (httpx.TimeoutException, httpx.RequestError) as e:
@@ -113,23 +326,175 @@ async def get_embedding(text: str, max_retries: int = 3) -> list[float]:
         raise EmbeddingGenerationError("Max retries exceeded for embedding generation")
 
 
-async def embed_chunks(chunks: list[str]) -> list[dict]:
+async def get_embeddings(texts: list[str], max_retries: int = 3) -> list[np.ndarray]:
+    """
+    Get embeddings for a batch of texts, serving repeated texts from the cache.
+
+    Only texts missing from the cache are sent to OpenAI (in a single request).
+
+    Args:
+        texts (list[str]): The texts to embed (at most EMBEDDING_BATCH_SIZE)
+        max_retries (int): Maximum number of retry attempts for rate limiting
+
+    Returns:
+        list[np.ndarray]: One float32 embedding vector per input text, in input order
+    """
+    keys = [_cache_key(text) for text in texts]
+    embeddings = [_embedding_cache.get(key) for key in keys]
+    missing = [i for i, vector in enumerate(embeddings) if vector is None]
+
+    if missing:
+        fresh = await _request_embeddings(
+            [texts[i] for i in missing], max_retries=max_retries
+        )
+        for i, vector in zip(missing, fresh):
+            embeddings[i] = vector
+            _embedding_cache.put(keys[i], vector)
+
+    return embeddings
+
+
+async def get_embedding(text: str, max_retries: int = 3) -> np.ndarray:
+    """
+    Get embedding for text using OpenAI's API.
+
+    Args:
+        text (str): The text to embed
+        max_retries (int): Maximum number of retry attempts for rate limiting
+
+    Returns:
+        np.ndarray: The float32 embedding vector
+
+    Raises:
+        HTTPException: On API errors, timeouts, or other failures
+    """
+    # Truncate before joining a shared batch: an input over the context
+    # window would get the whole request rejected
+    text = _truncate_to_context(text)
+    key = _cache_key(text)
+    cached = _embedding_cache.get(key)
+    if cached is not None:
+        return cached
+
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.create_task(_query_batcher.embed(text, max_retries))
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+    # Shielded so one cancelled caller doesn't cancel the request for the rest
+    return await asyncio.shield(task)
+
+
+@lru_cache(maxsize=1)
+def get_encoding() -> tiktoken.Encoding:
+    """
+    Return the embedding model's tokenizer, loading its BPE ranks only once.
+
+    Loading is deferred to first use (or app startup) rather than import time,
+    since a cold load may need to download the ranks file.
+    """
+    return tiktoken.encoding_for_model(EMBEDDING_MODEL)
+
+
+def _truncate_to_context(text: str) -> str:
+    """Truncate text to MAX_INPUT_TOKENS tokens, if it could be longer."""
+    # Every token spans at least one UTF-8 byte, so short text needs no tokenizer
+    if len(text) * 4 <= MAX_INPUT_TOKENS or len(text.encode()) <= MAX_INPUT_TOKENS:
+        return text
+    encoding = get_encoding()
+    tokens = encoding.encode_ordinary(text)
+    if len(tokens) <= MAX_INPUT_TOKENS:
+        return text
+    return encoding.decode(tokens[:MAX_INPUT_TOKENS])
+
+
+def _build_batches(chunks: list[str]) -> list[list[str]]:
+    """
+    Group chunks into request batches bounded by input count and total tokens.
+
+    Inputs longer than the model's context window are truncated to
+    MAX_INPUT_TOKENS, so a single oversize chunk cannot fail its whole batch
+    with a 400 and force the batch to be resubmitted.
+    """
+    encoding = get_encoding()
+
+    batches: list[list[str]] = []
+    current: list[str] = []
+    current_tokens = 0
+
+    for chunk in chunks:
+        tokens = encoding.encode_ordinary(chunk)
+        if len(tokens) > MAX_INPUT_TOKENS:
+            tokens = tokens[:MAX_INPUT_TOKENS]
+            chunk = encoding.decode(tokens)
+
+        if current and (
+            len(current) == EMBEDDING_BATCH_SIZE
+            or current_tokens + len(tokens) > MAX_BATCH_TOKENS
+        ):
+            batches.append(current)
+            current, current_tokens = [], 0
+
+        current.append(chunk)
+        current_tokens += len(tokens)
+
+    if current:
+        batches.append(current)
+    return batches
+
+
+async def embed_chunks(
+    chunks: list[str], qdrant: AsyncQdrantClient | None = None
+) -> list[dict]:
     """
     Embeds a list of text chunks using OpenAI's embedding API with concurrency control.
 
+    Chunks are sent in batches of up to EMBEDDING_BATCH_SIZE inputs (and
+    MAX_BATCH_TOKENS tokens) per request, so a document with N chunks needs
+    roughly ceil(N / EMBEDDING_BATCH_SIZE) round-trips instead of N.
+    Identical chunks (repeated boilerplate, headers, etc.) are embedded once
+    and the vector is shared between them.
+
     Args:
         chunks (list[str]): A list of text chunks to be embedded.
+        qdrant (AsyncQdrantClient | None): If given, chunks already in the
+            persistent embedding store are read from it instead of OpenAI,
+            and newly embedded chunks are written back.
 
     Returns:
         list[dict]: A list of dictionaries containing the chunk and its embedding.
     """
-    # Process chunks concurrently (but with rate limiting)
-    semaphore = asyncio.Semaphore(5)  # Max 5 concurrent requests
 
-    async def embed_single(chunk):
-        async with semaphore:
-            embedding = await get_embedding(chunk)
-            return {"chunk": chunk, "embedding": embedding}
+    # Process batches concurrently, bounded by the process-wide semaphore
+    async def embed_batch(batch: list[str]) -> list[np.ndarray]:
+        async with _embed_semaphore:
+            return await get_embeddings(batch)
+
+    # Map each distinct chunk to its slot, preserving first-seen order
+    unique: dict[str, int] = {}
+    for chunk in chunks:
+        unique.setdefault(chunk, len(unique))
+    texts = list(unique)
+
+    if qdrant is not None:
+        embeddings = await embedding_store.get_many(qdrant, texts)
+    else:
+        embeddings = [None] * len(texts)
+    missing = [i for i, vector in enumerate(embeddings) if vector is None]
+    # Batch similar lengths together so one long chunk doesn't stretch a batch
+    # of short ones, and token-capped batches pack more evenly; results are
+    # scattered back by index below
+    missing.sort(key=lambda i: len(texts[i]))
+
+    if missing:
+        batches = _build_batches([texts[i] for i in missing])
+        batch_embeddings = await asyncio.gather(*(embed_batch(b) for b in batches))
+        fresh = [vector for batch in batch_embeddings for vector in batch]
+        for i, vector in zip(missing, fresh):
+            embeddings[i] = vector
+        if qdrant is not None:
+            await embedding_store.put_many(qdrant, [texts[i] for i in missing], fresh)
 
-    tasks = [embed_single(chunk) for chunk in chunks]
-    return await asyncio.gather(*tasks)
+    return [
+        {"chunk": chunk, "embedding": embeddings[unique[chunk]]} for chunk in chunks
+    ]
@@ -0,0 +1,97 @@
+import hashlib
+import uuid
+import numpy as np
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.http.models import (
+    Distance,
+    HnswConfigDiff,
+    PointStruct,
+    VectorParams,
+)
+from utils.logging_config import logger
+
+
+class EmbeddingStore:
+    """
+    Embeddings persisted in a Qdrant collection, addressed by content hash.
+
+    Point ids are derived from sha256(model + text), so identical chunks in
+    later uploads (or after a restart) are served from Qdrant instead of
+    being re-embedded, and switching models never returns stale vectors.
+    The store is best-effort: a Qdrant error is logged and treated as a miss.
+    The collection is created at startup, or on the first write if that failed.
+    """
+
+    def __init__(self, collection_name: str, model: str):
+        self.collection_name = collection_name
+        self.model = model
+        self._collection_ready = False
+
+    def point_id(self, text: str) -> str:
+        digest = hashlib.sha256(f"{self.model}\x00{text}".encode()).digest()
+        return str(uuid.UUID(bytes=digest[:16]))
+
+    async def ensure_collection(
+        self, client: AsyncQdrantClient, vector_size: int
+    ) -> None:
+        if await client.collection_exists(collection_name=self.collection_name):
+            self._collection_ready = True
+            return
+        await client.create_collection(
+            collection_name=self.collection_name,
+            vectors_config=VectorParams(
+                size=vector_size, distance=Distance.COSINE, on_disk=True
+            ),
+            # Only ever read by id, so skip building an HNSW graph
+            hnsw_config=HnswConfigDiff(m=0),
+        )
+        self._collection_ready = True
+        logger.info(f"Collection '{self.collection_name}' created")
+
+    async def get_many(
+        self, client: AsyncQdrantClient, texts: list[str]
+    ) -> list[np.ndarray | None]:
+        """Return the stored vector for each text, or None where there is none."""
+        ids = [self.point_id(text) for text in texts]
+        try:
+            records = await client.retrieve(
+                collection_name=self.collection_name,
+                ids=ids,
+                with_payload=False,
+                with_vectors=True,
+            )
+        except Exception as e:
+            logger.warning(f"Embedding cache lookup failed: {e}")
+            return [None] * len(texts)
+
+        found = {str(r.id): np.asarray(r.vector, dtype=np.float32) for r in records}
+        return [found.get(point_id) for point_id in ids]
+
+    async def put_many(
+        self,
+        client: AsyncQdrantClient,
+        texts: list[str],
+        vectors: list[np.ndarray],
+    ) -> None:
+        if not vectors:
+            return
+        if not self._collection_ready:
+            try:
+                await self.ensure_collection(client, vector_size=len(vectors[0]))
+            except Exception as e:
+                logger.warning(f"Embedding cache collection unavailable: {e}")
+                return
+        points = [
+            PointStruct(
+                id=self.point_id(text),
+                vector=vector.tolist(),
+                payload={"model": self.model},
+            )
+            for text, vector in zip(texts, vectors)
+        ]
+        try:
+            await client.upsert(
+                collection_name=self.collection_name, points=points, wait=False
+            )
+        except Exception as e:
+            logger.warning(f"Embedding cache write failed: {e}")
@@ -0,0 +1,67 @@
+import math
+from collections import Counter
+from typing import Iterable
+from qdrant_client import AsyncQdrantClient
+from utils.logging_config import logger
+
+
+class IdfStore:
+    """
+    Corpus-wide document frequencies, maintained as chunks are uploaded.
+
+    Terms are lowercased whitespace tokens, the same as utils.idf.compute_idf,
+    and IDF uses the same smoothed formula. Each chunk counts as one document.
+    """
+
+    def __init__(self):
+        self._df: Counter[str] = Counter()
+        self.n_docs = 0
+        # Set once the counts cover the stored corpus, not just this
+        # process's uploads; until then searches estimate IDF per query
+        self.loaded = False
+
+    def add_documents(self, documents: Iterable[str]) -> None:
+        for doc in documents:
+            self._df.update(set(doc.lower().split()))
+            self.n_docs += 1
+
+    def idf_for(self, query: str) -> dict[str, float]:
+        """Return IDF weights for the query's terms only."""
+        n = self.n_docs
+        return {
+            term: math.log((n + 1) / (self._df.get(term, 0) + 1)) + 1
+            for term in set(query.lower().split())
+        }
+
+    async def load_from_qdrant(
+        self, client: AsyncQdrantClient, collection_name: str, batch_size: int = 1000
+    ) -> None:
+        """
+        Rebuild the counts from every chunk's text already stored in Qdrant.
+
+        The scroll covers the whole collection, so it runs in the background at
+        startup. Counts are swapped in only once complete; if the scroll fails,
+        the store stays unloaded and searches keep estimating IDF per query.
+        """
+        loaded = IdfStore()
+        offset = None
+        try:
+            while True:
+                points, offset = await client.scroll(
+                    collection_name=collection_name,
+                    limit=batch_size,
+                    offset=offset,
+                    with_payload=["text"],
+                    with_vectors=False,
+                )
+                loaded.add_documents((p.payload or {}).get("text", "") for p in points)
+                if offset is None:
+                    break
+        except Exception as e:
+            logger.warning(f"Could not load document frequencies from Qdrant: {e}")
+            return
+        self._df, self.n_docs, self.loaded = loaded._df, loaded.n_docs, True
+        logger.info(f"Loaded document frequencies for {self.n_docs} chunks")
+
+
+idf_store = IdfStore()
@@ -1,18 +1,33 @@
 import asyncio
 import httpx
+import orjson
 import random
-from typing import Dict, List
+import tiktoken
+from functools import lru_cache
+from typing import AsyncIterator, Dict, List
 from utils.logging_config import logger
 from config import settings
 from exceptions import OpenAIServiceError
+from services import openai_client
 
-OPENAI_CHAT_URL = "https://api.openai.com/v1/chat/completions"
+OPENAI_CHAT_PATH = "/v1/chat/completions"
+
+
+@lru_cache(maxsize=1)
+def get_chat_encoding() -> tiktoken.Encoding:
+    """Return the chat model's tokenizer (o200k_base for gpt-4o), loaded once."""
+    try:
+        return tiktoken.encoding_for_model(settings.OPENAI_CHAT_MODEL)
+    except KeyError:
+        # Model names tiktoken doesn't know yet; current OpenAI chat models
+        # all use o200k_base
+        return tiktoken.get_encoding("o200k_base")
 
 
 def _extract_error_message(response: httpx.Response) -> str:
     """Extract error message from OpenAI API response."""
     try:
-        error_response = response.json()
+        error_response = orjson.loads(response.content)
         if "error" in error_response:
             return error_response["error"].get("message", "Unknown error")
     except Exception:
@@ -20,30 +35,34 @@ def _extract_error_message(response: httpx.Response) -> str:
     return response.text
 
 
-async def _make_chat_request(
+def _chat_payload(
     messages: List[Dict[str, str]],
-    model: str | None = None,
-    temperature: float | None = None,
-    max_tokens: int | None = None,
-) -> str:
-    """Make a single chat completion request to OpenAI API."""
-    headers = {
-        "Authorization": f"Bearer {settings.OPENAI_API_KEY}",
-        "Content-Type": "application/json",
-    }
-
-    json_data = {
+    model: str | None,
+    temperature: float | None,
+    max_tokens: int | None,
+) -> dict:
+    return {
         "model": model or settings.OPENAI_CHAT_MODEL,
         "messages": messages,
         "temperature": temperature or settings.SUMMARY_TEMPERATURE,
         "max_tokens": max_tokens or settings.MAX_SUMMARY_TOKENS,
     }
 
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        response = await client.post(OPENAI_CHAT_URL, headers=headers, json=json_data)
-        response.raise_for_status()
-        data = response.json()
-        return data["choices"][0]["message"]["content"]
+
+async def _make_chat_request(
+    messages: List[Dict[str, str]],
+    model: str | None = None,
+    temperature: float | None = None,
+    max_tokens: int | None = None,
+) -> str:
+    """Make a single chat completion request to OpenAI API."""
+    json_data = _chat_payload(messages, model, temperature, max_tokens)
+    response = await openai_client.client.post(
+        OPENAI_CHAT_PATH, content=orjson.dumps(json_data)
+    )
+    response.raise_for_status()
+    data = orjson.loads(response.content)
+    return data["choices"][0]["message"]["content"]
 
 
 async def get_chat_completion(
@@ -113,6 +132,112 @@ async def get_chat_completion(
         raise OpenAIServiceError("Max retries exceeded for chat completion")
 
 
+async def _iter_stream_content(response: httpx.Response) -> AsyncIterator[str]:
+    """Yield the content deltas from a chat completion's server-sent events."""
+    async for line in response.aiter_lines():
+        if not line.startswith("data: "):
+            continue
+        data = line[len("data: ") :]
+        if data == "[DONE]":
+            return
+        choices = orjson.loads(data).get("choices")
+        if choices:
+            content = choices[0].get("delta", {}).get("content")
+            if content:
+                yield content
+
+
+async def stream_chat_completion(
+    messages: List[Dict[str, str]],
+    model: str | None = None,
+    temperature: float | None = None,
+    max_tokens: int | None = None,
+    max_retries: int = 3,
+) -> AsyncIterator[str]:
+    """
+    Stream a chat completion from OpenAI's API, yielding text as it is generated.
+
+    Rate limits and connection failures are retried only until the first
+    token arrives; once output has been yielded a failure is raised, since
+    retrying would repeat text the caller already has.
+
+    Args:
+        messages: List of message objects [{"role": "user", "content": "..."}]
+        model: OpenAI model to use (defaults to config setting)
+        temperature: Creativity level (defaults to config setting)
+        max_tokens: Maximum tokens in response (defaults to config setting)
+        max_retries: Maximum retry attempts for rate limiting
+
+    Yields:
+        str: Successive pieces of the completion text
+
+    Raises:
+        OpenAIServiceError: On API errors, timeouts, or other failures
+    """
+    json_data = _chat_payload(messages, model, temperature, max_tokens)
+    json_data["stream"] = True
+    started = False
+
+    for attempt in range(max_retries):
+        try:
+            async with openai_client.client.stream(
+                "POST", OPENAI_CHAT_PATH, content=orjson.dumps(json_data)
+            ) as response:
+                if response.status_code == 429 and attempt < max_retries - 1:
+                    wait_time = (2**attempt) + random.uniform(0, 1)
+                    logger.warning(f"Rate limited, retrying in {wait_time:.1f}s")
+                    await asyncio.sleep(wait_time)
+                    continue
+                if response.is_error:
+                    await response.aread()
+                    raise OpenAIServiceError(
+                        f"OpenAI API error: {response.status_code} - "
+                        f"{_extract_error_message(response)}"
+                    )
+                async for content in _iter_stream_content(response):
+                    started = True
+                    yield content
+                return
+
+        except (httpx.TimeoutException, httpx.RequestError) as e:
+            if started or attempt == max_retries - 1:
+                raise OpenAIServiceError(f"OpenAI streaming request failed: {e}")
+            wait_time = 2**attempt
+            logger.warning(f"Request failed, retrying in {wait_time}s")
+            await asyncio.sleep(wait_time)
+
+    raise OpenAIServiceError("Max retries exceeded for chat completion")
+
+
+_SUMMARY_SYSTEM_MESSAGE = (
+    "You are a helpful AI assistant that summarizes document "
+    "search results. Provide accurate, well-structured summaries "
+    "based only on the provided context."
+)
+
+# Full user-message template per summary style, built once at import
+_STYLE_INSTRUCTIONS = {
+    "comprehensive": (
+        "Provide a detailed, comprehensive summary that thoroughly "
+        "answers the query."
+    ),
+    "brief": "Provide a concise, brief summary focusing on the key points.",
+    "bullet_points": (
+        "Provide a summary in bullet points highlighting the main findings."
+    ),
+}
+_STYLE_TEMPLATES = {
+    style: (
+        'Based on the following document chunks related to the query "{query}", '
+        f"{instruction}\n\n"
+        "Context from documents:\n{context}\n\n"
+        "Please synthesize this information to provide a coherent answer "
+        'to the original query: "{query}"'
+    )
+    for style, instruction in _STYLE_INSTRUCTIONS.items()
+}
+
+
 def create_summary_messages(
     query: str, chunks: List[str], style: str = "comprehensive"
 ) -> List[Dict[str, str]]:
@@ -127,39 +252,50 @@ def create_summary_messages(
     Returns:
         List of message objects for OpenAI chat API
     """
-    # Combine all chunks into context
-    context = "\n\n".join([f"Chunk {i + 1}: {chunk}" for i, chunk in enumerate(chunks)])
-
-    # Style-specific prompts
-    style_prompts = {
-        "comprehensive": (
-            "Provide a detailed, comprehensive summary that thoroughly "
-            "answers the query."
-        ),
-        "brief": "Provide a concise, brief summary focusing on the key points.",
-        "bullet_points": (
-            "Provide a summary in bullet points highlighting the main findings."
-        ),
-    }
+    context = "\n\n".join(f"Chunk {i + 1}: {chunk}" for i, chunk in enumerate(chunks))
+    template = _STYLE_TEMPLATES.get(style, _STYLE_TEMPLATES["comprehensive"])
 
-    style_instruction = style_prompts.get(style, style_prompts["comprehensive"])
+    return [
+        {"role": "system", "content": _SUMMARY_SYSTEM_MESSAGE},
+        {"role": "user", "content": template.format(context=context, query=query)},
+    ]
 
-    user_message = (
-        f'Based on the following document chunks related to the query "{query}", '
-        f"{style_instruction}\n\n"
-        f"Context from documents:\n{context}\n\n"
-        f"Please synthesize this information to provide a coherent answer "
-        f'to the original query: "{query}"'
-    )
 
+def create_query_expansion_messages(query: str, count: int) -> List[Dict[str, str]]:
+    """
+    Helper function to create messages asking for paraphrases of a search query.
+
+    Args:
+        query: Original search query
+        count: Number of alternative phrasings to request
+
+    Returns:
+        List of message objects for OpenAI chat API
+    """
     return [
         {
             "role": "system",
             "content": (
-                "You are a helpful AI assistant that summarizes document "
-                "search results. Provide accurate, well-structured summaries "
-                "based only on the provided context."
+                "You rewrite search queries for a semantic document search "
+                "engine. Reply with one rewritten query per line and nothing else."
+            ),
+        },
+        {
+            "role": "user",
+            "content": (
+                f"Write {count} alternative phrasings of this search query that "
+                f'keep its meaning but vary the wording: "{query}"'
             ),
         },
-        {"role": "user", "content": user_message},
     ]
+
+
+def parse_query_variants(completion: str, count: int) -> List[str]:
+    """Pull up to `count` query variants out of a line-per-variant completion."""
+    variants = []
+    for line in completion.splitlines():
+        # Models sometimes number or bullet the lines despite instructions
+        variant = line.strip().lstrip("-*0123456789.) ").strip().strip('"')
+        if variant:
+            variants.append(variant)
+    return variants[:count]
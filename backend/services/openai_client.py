@@ -0,0 +1,23 @@
+import httpx
+from config import settings
+
+OPENAI_BASE_URL = "https://api.openai.com"
+
+# Shared by the embedding and chat services so every OpenAI call reuses pooled
+# keep-alive connections (multiplexed over HTTP/2) instead of paying a
+# TCP+TLS handshake per request.
+client = httpx.AsyncClient(
+    base_url=OPENAI_BASE_URL,
+    headers={
+        "Authorization": f"Bearer {settings.OPENAI_API_KEY}",
+        "Content-Type": "application/json",
+    },
+    timeout=httpx.Timeout(timeout=30.0, connect=10.0),
+    limits=httpx.Limits(max_keepalive_connections=20, max_connections=100),
+    http2=True,
+)
+
+
+async def close_client() -> None:
+    """Close the shared OpenAI HTTP client (called on application shutdown)."""
+    await client.aclose()
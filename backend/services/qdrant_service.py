@@ -1,42 +1,86 @@
+import asyncio
+import hashlib
+import httpx
+import random
 import uuid
-import requests
+from urllib.parse import urlsplit
+import numpy as np
 from typing import List
 from utils.logging_config import logger
-from qdrant_client import QdrantClient
-from qdrant_client.http.models import Distance, VectorParams, PointStruct
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.http.models import (
+    Batch,
+    Datatype,
+    Distance,
+    HnswConfigDiff,
+    QueryRequest,
+    QuantizationSearchParams,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    SearchParams,
+    VectorParams,
+)
 from qdrant_client.http.exceptions import UnexpectedResponse
 from exceptions import QdrantServiceError, VectorSearchError
-from config import settings
-
+from config import Settings, settings
 
-# Test basic connectivity
-try:
-    response = requests.get(f"{settings.QDRANT_URL}/collections", timeout=10)
-    logger.info(f"GET /collections successful: {response.status_code}")
 
-    # Test creating a collection via HTTP
-    test_collection = {"vectors": {"size": 384, "distance": "Cosine"}}
-    response = requests.put(
-        f"{settings.QDRANT_URL}/collections/http_test", json=test_collection, timeout=10
+def create_client(settings: Settings) -> AsyncQdrantClient:
+    """
+    Build the Qdrant client from settings; the one place its transport is
+    configured, for local, Docker/Helm and Railway deployments alike.
+    """
+    logger.info(
+        f"Connecting to Qdrant at {settings.QDRANT_URL} "
+        f"with prefer_grpc={settings.QDRANT_PREFER_GRPC}"
+    )
+    return AsyncQdrantClient(
+        url=settings.QDRANT_URL,
+        # An https URL without a port (e.g. behind Railway's proxy) means 443,
+        # not Qdrant's default 6333; an explicit port in the URL always wins
+        port=443 if urlsplit(settings.QDRANT_URL).scheme == "https" else 6333,
+        # Protobuf upserts/searches are far smaller on the wire than JSON floats
+        prefer_grpc=settings.QDRANT_PREFER_GRPC,
+        grpc_port=settings.QDRANT_GRPC_PORT,
+        # Keepalive pings stop proxies from silently dropping idle gRPC channels
+        grpc_options={
+            "grpc.keepalive_time_ms": 10_000,
+            "grpc.keepalive_timeout_ms": 5_000,
+        },
+        timeout=settings.QDRANT_TIMEOUT,
+        # REST fallback: multiplex over warm HTTP/2 connections rather than
+        # handshaking per request
+        http2=True,
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
     )
-    logger.info(f"PUT collection via HTTP: {response.status_code}")
 
-except Exception as e:
-    logger.error(f"HTTP test failed: {e}")
 
+client = create_client(settings)
+
+# Search-time HNSW beam width; higher trades latency for recall
+DEFAULT_HNSW_EF = 128
 
-client = QdrantClient(
-    url=settings.QDRANT_URL, prefer_grpc=False, timeout=60, https=True, port=443
-)
 
-logger.info(f"Connecting to Qdrant at {settings.QDRANT_URL} with prefer_grpc=False")
+def quantized_search_params(hnsw_ef: int | None = None) -> SearchParams:
+    """
+    Build search params that walk the HNSW graph with the given beam width,
+    scan the int8 index, then rescore the oversampled candidates with the
+    original float32 vectors so ranking accuracy is preserved.
+    """
+    return SearchParams(
+        hnsw_ef=hnsw_ef or DEFAULT_HNSW_EF,
+        quantization=QuantizationSearchParams(
+            ignore=False, rescore=True, oversampling=2.0
+        ),
+    )
 
 
-def create_collection(
-    client: QdrantClient, collection_name: str, vector_size: int
+async def create_collection(
+    client: AsyncQdrantClient, collection_name: str, vector_size: int
 ) -> None:
     try:
-        if client.collection_exists(collection_name=collection_name):
+        if await client.collection_exists(collection_name=collection_name):
             logger.info(
                 f"Collection '{collection_name}' already exists. Skipping creation."
             )
@@ -45,11 +89,28 @@ def create_collection(
         logger.warning(f"Error checking collection: {e}. Proceeding with creation.")
 
     try:
-        client.create_collection(
+        await client.create_collection(
             collection_name=collection_name,
             vectors_config=VectorParams(
                 size=vector_size,
                 distance=Distance.COSINE,
+                # Full-precision vectors live on disk; only int8 copies stay in
+                # RAM. They are only read to rescore, where float16 is plenty
+                # and halves the disk footprint of float32.
+                on_disk=True,
+                datatype=Datatype.FLOAT16,
+            ),
+            # Denser graph than the defaults (m=16, ef_construct=100) for
+            # better recall on 1536-d embeddings
+            hnsw_config=HnswConfigDiff(
+                m=32, ef_construct=256, full_scan_threshold=10000
+            ),
+            quantization_config=ScalarQuantization(
+                scalar=ScalarQuantizationConfig(
+                    type=ScalarType.INT8,
+                    quantile=0.99,
+                    always_ram=True,
+                )
             ),
         )
         logger.info(
@@ -65,89 +126,158 @@ def create_collection(
             raise
 
 
-def insert_vectors_batch(
-    client: QdrantClient,
+async def bootstrap_collection(
+    client: AsyncQdrantClient,
+    collection_name: str,
+    vector_size: int,
+    max_attempts: int = 5,
+    base_delay: float = 2.0,
+    max_delay: float = 60.0,
+) -> bool:
+    """
+    Create the collection at startup, retrying while Qdrant comes up.
+
+    Waits with jittered exponential backoff between attempts and never sleeps
+    after the final one.
+
+    Returns:
+        bool: True if the collection is ready, False if every attempt failed.
+    """
+    for attempt in range(1, max_attempts + 1):
+        try:
+            await create_collection(client, collection_name, vector_size)
+            return True
+        except Exception as e:
+            logger.warning(f"Qdrant not ready (attempt {attempt}/{max_attempts}): {e}")
+        if attempt < max_attempts:
+            delay = min(base_delay * 2 ** (attempt - 1), max_delay)
+            await asyncio.sleep(random.uniform(delay / 2, delay))
+    return False
+
+
+def content_point_id(payload: dict) -> str:
+    """Derive a stable UUID from a chunk's source file, position and text."""
+    # chunk_index keeps repeated passages within one document distinct
+    key = (
+        f"{payload.get('file_name', '')}\x00{payload.get('chunk_index', '')}"
+        f"\x00{payload.get('text', '')}"
+    )
+    digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+    return str(uuid.UUID(bytes=digest))
+
+
+def _point_id(item: dict, generate_ids: bool) -> str:
+    point_id = item.get("id")
+    if not point_id and generate_ids:
+        # Content-derived id keeps upserts idempotent across re-uploads
+        point_id = content_point_id(item.get("payload") or {})
+    if not point_id:
+        raise QdrantServiceError(
+            "Each item must have an 'id' or enable 'generate_ids=True'."
+        )
+    return point_id
+
+
+async def insert_vectors_batch(
+    client: AsyncQdrantClient,
     collection_name: str,
     items: List[dict],
     batch_size: int = 500,
-    generate_ids: bool = False,
+    generate_ids: bool = True,
 ) -> None:
     """
     Insert vectors and their metadata into a Qdrant collection in batches.
 
     Args:
-        client (QdrantClient): The Qdrant client.
+        client (AsyncQdrantClient): The Qdrant client.
         collection_name (str): Target collection name.
         items (List[dict]): List of dictionaries each with:
             - 'id' (optional): unique string id for the vector point
-            - 'embedding': List[float], the vector itself
+            - 'embedding': np.ndarray (float32) or List[float], the vector itself
             - 'payload': dict with metadata
         batch_size (int): How many points to send per batch.
-        generate_ids (bool): If True, generate UUIDs as IDs if 'id' is missing.
+        generate_ids (bool): If True, derive an ID from the payload's file name,
+            chunk index and text when 'id' is missing. Derived IDs are
+            deterministic, so re-inserting the same chunk overwrites its point
+            instead of duplicating it.
 
     Returns:
         None
     """
-    batch = []
-    for i, item in enumerate(items, 1):
-        point_id = item.get("id")
-        if generate_ids and not point_id:
-            # Generate a UUIDv4 string if no id provided and generate_ids=True
-            point_id = str(uuid.uuid4())
-
-        if not point_id:
-            raise QdrantServiceError(
-                "Each item must have an 'id' or enable 'generate_ids=True'."
-            )
-
-        point = PointStruct(
-            id=point_id,
-            vector=item["embedding"],
-            payload=item.get("payload", {}),
+    for start in range(0, len(items), batch_size):
+        batch = items[start : start + batch_size]
+        # Columnar upload: no per-point PointStruct validation, and the vectors
+        # are stacked and converted for the JSON boundary in a single pass
+        vectors = np.stack(
+            [np.asarray(item["embedding"], dtype=np.float32) for item in batch]
+        )
+        ids = [_point_id(item, generate_ids) for item in batch]
+        await client.upsert(
+            collection_name=collection_name,
+            points=Batch(
+                ids=ids,
+                vectors=vectors.tolist(),
+                payloads=[item.get("payload") or {} for item in batch],
+            ),
         )
-        batch.append(point)
+        logger.info(f"Inserted batch of {len(batch)} vectors into '{collection_name}'.")
 
-        if len(batch) == batch_size or i == len(items):
-            client.upsert(collection_name=collection_name, points=batch)
-            logger.info(
-                f"Inserted batch of {len(batch)} vectors into '{collection_name}'."
-            )
-            batch.clear()
 
+async def existing_point_ids(
+    client: AsyncQdrantClient, collection_name: str, ids: List[str]
+) -> set[str]:
+    """Return which of the given point ids are already stored, in one request."""
+    if not ids:
+        return set()
+    points = await client.retrieve(
+        collection_name=collection_name,
+        ids=ids,
+        with_payload=False,
+        with_vectors=False,
+    )
+    return {str(point.id) for point in points}
 
-def search_vectors(
-    client: QdrantClient,
+
+async def search_vectors(
+    client: AsyncQdrantClient,
     collection_name: str,
-    query_vector: List[float],
+    query_vector: np.ndarray | List[float],
     limit: int = 10,
     score_threshold: float = 0.7,
+    payload_fields: List[str] | None = None,
+    search_params: SearchParams | None = None,
 ) -> List[dict]:
     """
     Search for vectors in a Qdrant collection.
 
     Args:
-        client (QdrantClient): The Qdrant client.
+        client (AsyncQdrantClient): The Qdrant client.
         collection_name (str): Target collection name.
-        query_vector (List[float]): The vector to search for.
+        query_vector (np.ndarray | List[float]): The vector to search for.
         limit (int): Maximum number of results to return.
         score_threshold (float): Minimum score threshold for results.
+        payload_fields (List[str] | None): Payload keys to return. None returns
+            the full payload; listing only the needed keys shrinks the response.
+        search_params (SearchParams | None): Optional query tuning, e.g.
+            quantized_search_params() to tune hnsw_ef and rescore quantized hits.
 
     Returns:
         List[dict]: List of search results with 'id', 'score', and 'payload'.
     """
     try:
-        search_results = client.search(
+        response = await client.query_points(
             collection_name=collection_name,
-            query_vector=query_vector,
+            query=query_vector,
             limit=limit,
             score_threshold=score_threshold,
-            with_payload=True,
+            with_payload=payload_fields if payload_fields is not None else True,
             with_vectors=False,  # Don't return vectors to save bandwidth
+            search_params=search_params,
         )
 
         # Convert to dict for easier handling
         results = []
-        for result in search_results:
+        for result in response.points:
             results.append(
                 {
                     "id": str(result.id),
@@ -162,3 +292,58 @@ def search_vectors(
     except Exception as e:
         logger.error(f"Error during search: {e}")
         raise VectorSearchError(f"Vector search failed: {str(e)}")
+
+
+async def batch_search(
+    client: AsyncQdrantClient,
+    collection_name: str,
+    query_vectors: List[np.ndarray] | List[List[float]],
+    limit: int = 10,
+    score_threshold: float = 0.7,
+    payload_fields: List[str] | None = None,
+    search_params: SearchParams | None = None,
+) -> List[List[dict]]:
+    """
+    Search for several query vectors in a single Qdrant request.
+
+    Args:
+        client (AsyncQdrantClient): The Qdrant client.
+        collection_name (str): Target collection name.
+        query_vectors (List[np.ndarray] | List[List[float]]): Vectors to search for.
+        limit (int): Maximum number of results per vector.
+        score_threshold (float): Minimum score threshold for results.
+        payload_fields (List[str] | None): Payload keys to return. None returns
+            the full payload.
+        search_params (SearchParams | None): Optional query tuning.
+
+    Returns:
+        List[List[dict]]: One result list per query vector, each in the same
+            {'id', 'score', 'payload'} shape as search_vectors.
+    """
+    with_payload = payload_fields if payload_fields is not None else True
+    try:
+        responses = await client.query_batch_points(
+            collection_name=collection_name,
+            requests=[
+                QueryRequest(
+                    query=np.asarray(vector, dtype=np.float32).tolist(),
+                    limit=limit,
+                    score_threshold=score_threshold,
+                    with_payload=with_payload,
+                    with_vector=False,
+                    params=search_params,
+                )
+                for vector in query_vectors
+            ],
+        )
+        return [
+            [
+                {"id": str(point.id), "score": point.score, "payload": point.payload}
+                for point in response.points
+            ]
+            for response in responses
+        ]
+
+    except Exception as e:
+        logger.error(f"Error during batch search: {e}")
+        raise VectorSearchError(f"Vector batch search failed: {str(e)}")
@@ -0,0 +1,117 @@
+import hashlib
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+import numpy as np
+from config import settings
+
+
+@dataclass
+class _CacheEntry:
+    slot: int
+    params: tuple
+    response: dict
+    expires_at: float
+
+
+class QueryCache:
+    """
+    Two-tier cache of /search responses.
+
+    Exact hits are looked up by a hash of the normalized query text. On a
+    miss, the query embedding is compared against the embeddings of cached
+    queries, and a response is reused when their cosine similarity reaches
+    the threshold. Entries are scoped to the request parameters that shape
+    the response, expire after `ttl` seconds and are evicted LRU.
+
+    All methods are synchronous, so they are atomic with respect to the
+    event loop and need no lock.
+    """
+
+    def __init__(self, max_size: int, ttl: float, similarity_threshold: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.similarity_threshold = similarity_threshold
+        self._entries: OrderedDict[str, _CacheEntry] = OrderedDict()
+        # Row i holds the unit-normalized query embedding for slot i
+        self._vectors: np.ndarray | None = None
+        self._slot_keys: list[str | None] = [None] * max_size
+        self._free_slots = list(range(max_size - 1, -1, -1))
+
+    @staticmethod
+    def _key(query: str, params: tuple) -> str:
+        normalized = " ".join(query.lower().split())
+        return hashlib.sha256(f"{normalized}\x00{params!r}".encode()).hexdigest()
+
+    def _live_entry(self, key: str) -> _CacheEntry | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at < time.monotonic():
+            self._evict(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _evict(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        self._vectors[entry.slot] = 0.0
+        self._slot_keys[entry.slot] = None
+        self._free_slots.append(entry.slot)
+
+    def get(self, query: str, params: tuple) -> dict | None:
+        """Return the cached response for an identical (normalized) query."""
+        entry = self._live_entry(self._key(query, params))
+        return entry.response if entry else None
+
+    def get_similar(self, embedding: np.ndarray, params: tuple) -> dict | None:
+        """Return the cached response of the closest query above the threshold."""
+        if self._vectors is None or not self._entries:
+            return None
+
+        query = embedding / np.linalg.norm(embedding)
+        scores = self._vectors @ query
+        for slot in np.argsort(scores)[::-1]:
+            if scores[slot] < self.similarity_threshold:
+                break
+            key = self._slot_keys[slot]
+            entry = self._live_entry(key) if key else None
+            if entry is not None and entry.params == params:
+                return entry.response
+        return None
+
+    def put(
+        self, query: str, params: tuple, embedding: np.ndarray, response: dict
+    ) -> None:
+        if self.max_size <= 0:
+            return
+        if self._vectors is None:
+            self._vectors = np.zeros((self.max_size, len(embedding)), np.float32)
+
+        key = self._key(query, params)
+        if key in self._entries:
+            self._evict(key)
+        elif len(self._entries) >= self.max_size:
+            self._evict(next(iter(self._entries)))
+
+        slot = self._free_slots.pop()
+        self._vectors[slot] = embedding / np.linalg.norm(embedding)
+        self._slot_keys[slot] = key
+        self._entries[key] = _CacheEntry(
+            slot=slot,
+            params=params,
+            response=response,
+            expires_at=time.monotonic() + self.ttl,
+        )
+
+    def clear(self) -> None:
+        """Drop every entry, e.g. after new documents change search results."""
+        for key in list(self._entries):
+            self._evict(key)
+
+
+query_cache = QueryCache(
+    max_size=settings.QUERY_CACHE_SIZE,
+    ttl=settings.QUERY_CACHE_TTL_SECONDS,
+    similarity_threshold=settings.QUERY_CACHE_SIMILARITY,
+)
@@ -1,10 +1,32 @@
+import gzip
 import httpx
+import orjson
 from typing import List, Dict, Any
 from config import settings
 from utils.logging_config import logger
 from typing import Optional
 from exceptions import RustServiceError
 
+# Gzip re-rank bodies with more results than this; smaller payloads aren't
+# worth the CPU. Compressed sizes are typically 3-5x smaller (mostly chunk text)
+GZIP_MIN_RESULTS = 20
+
+# Shared client so every re-rank reuses a pooled keep-alive connection to the
+# Rust service instead of opening (and tearing down) one per search
+_client = httpx.AsyncClient(
+    base_url=settings.RUST_SERVICE_URL,
+    headers={"Content-Type": "application/json"},
+    timeout=httpx.Timeout(5.0),
+    limits=httpx.Limits(
+        max_keepalive_connections=50, max_connections=200, keepalive_expiry=30.0
+    ),
+)
+
+
+async def close_client() -> None:
+    """Close the shared Rust service HTTP client (called on application shutdown)."""
+    await _client.aclose()
+
 
 async def re_rank_results(
     query: str,
@@ -41,20 +63,19 @@ async def re_rank_results(
     # Prepare payload for Rust service
     payload = {
         "query": query,
+        # Only what scoring needs: ids are already strings from Qdrant, and
+        # the caller keeps each hit's payload to rebuild metadata afterwards
         "results": [
             {
-                "id": str(result["id"]),
+                "id": result["id"],
                 "text": result["payload"]["text"],
                 "score": result["score"],
-                "metadata": {
-                    "file_name": result["payload"].get("file_name", ""),
-                    "content_type": result["payload"].get("content_type", ""),
-                },
             }
             for result in results
         ],
         "limit": limit,
-        "idf_map": idf_map or {},
+        # null tells the re-ranker to weight every term equally
+        "idf_map": idf_map,
         "threshold": threshold,
     }
 
@@ -63,17 +84,20 @@ async def re_rank_results(
             f"Sending re-rank request to Rust service: "
             f"{settings.RUST_SERVICE_URL}/re-rank"
         )
-        async with httpx.AsyncClient(timeout=timeout) as client:
-            response = await client.post(
-                f"{settings.RUST_SERVICE_URL}/re-rank",
-                json=payload,
-                headers={"Content-Type": "application/json"},
-            )
+        # Encode with orjson in one C pass rather than httpx's stdlib json
+        body = orjson.dumps(payload)
+        headers = None
+        if len(payload["results"]) > GZIP_MIN_RESULTS:
+            body = gzip.compress(body, compresslevel=1)
+            headers = {"Content-Encoding": "gzip"}
+        response = await _client.post(
+            "/re-rank", content=body, headers=headers, timeout=timeout
+        )
 
         logger.debug(f"Rust service responded with status: {response.status_code}")
 
         if response.status_code == 200:
-            rust_response = response.json()
+            rust_response = orjson.loads(response.content)
             results_count = len(rust_response.get("results", []))
             logger.info(
                 f"Successfully re-ranked results, returning {results_count} items"
@@ -109,19 +133,18 @@ async def health_check_rust_service() -> bool:
     """
     try:
         logger.debug("Performing health check on Rust service")
-        async with httpx.AsyncClient(timeout=2.0) as client:
-            response = await client.get(f"{settings.RUST_SERVICE_URL}/health")
-            is_healthy = response.status_code == 200
-
-            if is_healthy:
-                logger.debug("Rust service health check passed")
-            else:
-                logger.warning(
-                    f"Rust service health check failed with status: "
-                    f"{response.status_code}"
-                )
-
-            return is_healthy
+        response = await _client.get("/health", timeout=2.0)
+        is_healthy = response.status_code == 200
+
+        if is_healthy:
+            logger.debug("Rust service health check passed")
+        else:
+            logger.warning(
+                f"Rust service health check failed with status: "
+                f"{response.status_code}"
+            )
+
+        return is_healthy
     except Exception as e:
         logger.error(f"Rust service health check failed: {str(e)}")
         return False
@@ -1,6 +1,13 @@
-import pytest
-from fastapi.testclient import TestClient
-from main import app
+import os
+
+# Settings are validated at import time, so provide dummy values before importing
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+os.environ.setdefault("QDRANT_URL", "http://localhost:6333")
+os.environ.setdefault("RUST_SERVICE_URL", "http://localhost:5000")
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from main import app  # noqa: E402
 
 
 @pytest.fixture
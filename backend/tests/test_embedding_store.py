@@ -0,0 +1,40 @@
+import asyncio
+import numpy as np
+from qdrant_client import AsyncQdrantClient
+from services.embedding_store import EmbeddingStore
+
+
+def test_embedding_store_round_trip_is_scoped_to_model():
+    async def run():
+        client = AsyncQdrantClient(":memory:")
+        store = EmbeddingStore("embedding_cache", model="model-a")
+        await store.ensure_collection(client, vector_size=2)
+
+        vector = np.array([0.6, 0.8], np.float32)
+        await store.put_many(client, ["hello"], [vector])
+        hits = await store.get_many(client, ["hello", "unseen"])
+        other_model = await EmbeddingStore("embedding_cache", "model-b").get_many(
+            client, ["hello"]
+        )
+        await client.close()
+        return hits, other_model
+
+    (hit, miss), other_model = asyncio.run(run())
+    np.testing.assert_allclose(hit, [0.6, 0.8], rtol=1e-6)
+    assert miss is None
+    assert other_model == [None]
+
+
+def test_first_write_creates_missing_collection():
+    async def run():
+        client = AsyncQdrantClient(":memory:")
+        store = EmbeddingStore("embedding_cache", model="model-a")  # Not ensured
+        before = await store.get_many(client, ["hello"])
+        await store.put_many(client, ["hello"], [np.array([0.6, 0.8], np.float32)])
+        after = await store.get_many(client, ["hello"])
+        await client.close()
+        return before, after
+
+    before, after = asyncio.run(run())
+    assert before == [None]
+    np.testing.assert_allclose(after[0], [0.6, 0.8], rtol=1e-6)
@@ -0,0 +1,45 @@
+import asyncio
+import numpy as np
+from qdrant_client import AsyncQdrantClient
+from services.idf_store import IdfStore
+from services.qdrant_service import create_collection, insert_vectors_batch
+
+
+def test_load_counts_stored_chunks():
+    async def run():
+        client = AsyncQdrantClient(":memory:")
+        await create_collection(client, "docs", vector_size=2)
+        await insert_vectors_batch(
+            client,
+            "docs",
+            [
+                {
+                    "embedding": np.array([1.0, float(i)], np.float32),
+                    "payload": {"text": text, "file_name": "a.txt", "chunk_index": i},
+                }
+                for i, text in enumerate(["rare word", "common word"])
+            ],
+        )
+        store = IdfStore()
+        await store.load_from_qdrant(client, "docs", batch_size=1)
+        await client.close()
+        return store
+
+    store = asyncio.run(run())
+    assert store.loaded and store.n_docs == 2
+    idf = store.idf_for("rare word")
+    assert idf["rare"] > idf["word"]
+
+
+def test_failed_load_leaves_store_unloaded():
+    async def run():
+        client = AsyncQdrantClient(":memory:")  # No such collection
+        store = IdfStore()
+        store.add_documents(["uploaded before the load"])
+        await store.load_from_qdrant(client, "missing")
+        await client.close()
+        return store
+
+    store = asyncio.run(run())
+    assert not store.loaded
+    assert store.n_docs == 1  # Existing counts are kept, not cleared
@@ -0,0 +1,38 @@
+import asyncio
+import numpy as np
+from qdrant_client import AsyncQdrantClient
+from services.qdrant_service import (
+    content_point_id,
+    create_collection,
+    existing_point_ids,
+    insert_vectors_batch,
+)
+
+
+def test_insert_keeps_repeated_chunks_and_reports_stored_ids():
+    def items(texts):
+        return [
+            {
+                "embedding": np.array([1.0, float(i)], np.float32),
+                "payload": {"text": text, "file_name": "a.txt", "chunk_index": i},
+            }
+            for i, text in enumerate(texts)
+        ]
+
+    grown = items(["same", "same", "x"])
+    ids = [content_point_id(item["payload"]) for item in grown]
+
+    async def run():
+        client = AsyncQdrantClient(":memory:")
+        await create_collection(client, "docs", vector_size=2)
+        await insert_vectors_batch(client, "docs", items(["same", "same"]))
+        await insert_vectors_batch(client, "docs", items(["same", "same"]))
+        stored = await existing_point_ids(client, "docs", ids)
+        count = (await client.count("docs")).count
+        await client.close()
+        return stored, count
+
+    stored, count = asyncio.run(run())
+    assert count == 2  # Repeated text at another index is its own point, and
+    # re-inserting overwrites in place
+    assert stored == set(ids[:2])
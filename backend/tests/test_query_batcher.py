@@ -0,0 +1,38 @@
+import asyncio
+import numpy as np
+import pytest
+from exceptions import OpenAIServiceError
+from services import embedding
+
+
+def test_rejected_query_batch_only_fails_the_bad_input(monkeypatch):
+    requests = []
+
+    async def fake_get_embeddings(texts, max_retries=3):
+        requests.append(list(texts))
+        if "bad query" in texts:
+            raise OpenAIServiceError(
+                "OpenAI API error: 400", error_code=embedding.CLIENT_ERROR_CODE
+            )
+        return [np.ones(2, np.float32) for _ in texts]
+
+    monkeypatch.setattr(embedding, "get_embeddings", fake_get_embeddings)
+
+    async def run():
+        return await asyncio.gather(
+            embedding.get_embedding("good query"),
+            embedding.get_embedding("bad query"),
+            return_exceptions=True,
+        )
+
+    good, bad = asyncio.run(run())
+    np.testing.assert_array_equal(good, [1.0, 1.0])
+    assert isinstance(bad, OpenAIServiceError)
+    # One shared request, then each text retried on its own
+    assert requests[0] == ["good query", "bad query"]
+    assert sorted(map(tuple, requests[1:])) == [("bad query",), ("good query",)]
+
+
+@pytest.mark.parametrize("text", ["short", "é" * 2000])
+def test_short_text_skips_truncation(text):
+    assert embedding._truncate_to_context(text) == text
@@ -0,0 +1,24 @@
+import numpy as np
+from services.query_cache import QueryCache
+
+
+def test_query_cache_exact_and_similar_hits():
+    cache = QueryCache(max_size=2, ttl=60, similarity_threshold=0.95)
+    params = (10, 0.7, None)
+    cache.put("Solar Power", params, np.array([1.0, 0.0], np.float32), {"id": 1})
+
+    assert cache.get("  solar   power ", params) == {"id": 1}
+    assert cache.get("solar power", (5, 0.7, None)) is None
+    assert cache.get_similar(np.array([0.99, 0.05], np.float32), params) == {"id": 1}
+    assert cache.get_similar(np.array([0.0, 1.0], np.float32), params) is None
+
+
+def test_query_cache_evicts_least_recently_used():
+    cache = QueryCache(max_size=2, ttl=60, similarity_threshold=0.95)
+    params = (10, 0.7, None)
+    for i, vector in enumerate(([1.0, 0.0], [0.0, 1.0], [1.0, 1.0])):
+        cache.put(f"q{i}", params, np.array(vector, np.float32), {"id": i})
+
+    assert cache.get("q0", params) is None
+    assert cache.get_similar(np.array([1.0, 0.0], np.float32), params) is None
+    assert cache.get("q2", params) == {"id": 2}
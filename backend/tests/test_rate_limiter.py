@@ -0,0 +1,19 @@
+import asyncio
+import pytest
+from services import embedding
+
+
+def test_waiters_get_staggered_slots(monkeypatch):
+    sleeps = []
+
+    async def fake_sleep(delay):
+        sleeps.append(delay)
+
+    monkeypatch.setattr(embedding.asyncio, "sleep", fake_sleep)
+    limiter = embedding._RateLimiter(requests_per_minute=600)  # 10/s, burst 10
+
+    async def run():
+        await asyncio.gather(*(limiter.acquire() for _ in range(12)))
+
+    asyncio.run(run())
+    assert sleeps == [pytest.approx(0.1, abs=0.01), pytest.approx(0.2, abs=0.01)]
@@ -0,0 +1,23 @@
+import httpx
+from services import embedding
+
+
+def _response(status_code: int, **headers: str) -> httpx.Response:
+    return httpx.Response(status_code, headers=headers)
+
+
+def test_server_delay_is_capped():
+    response = _response(429, **{"x-ratelimit-reset-requests": "6m0s"})
+    assert embedding._server_retry_delay(response) == 360.0
+    delay = embedding._retry_delay(response, attempt=0)
+    assert embedding.RETRY_MAX_DELAY <= delay
+    assert delay <= embedding.RETRY_MAX_DELAY + embedding.RETRY_BASE_DELAY
+
+
+def test_reset_header_ignored_for_server_errors():
+    response = _response(503, **{"x-ratelimit-reset-requests": "6m0s"})
+    assert embedding._server_retry_delay(response) is None
+
+
+def test_retry_after_honored_for_server_errors():
+    assert embedding._server_retry_delay(_response(503, **{"retry-after": "2"})) == 2.0
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+from routes import search
+from services.query_cache import query_cache
+
+
+@pytest.fixture
+def stub_search(monkeypatch):
+    async def fake_embedding(query):
+        return np.ones(4, dtype=np.float32)
+
+    async def fake_search_vectors(**kwargs):
+        return [
+            {
+                "id": "a",
+                "score": 0.9,
+                "payload": {"text": "solar power", "file_name": "energy.pdf"},
+            }
+        ]
+
+    async def failing_rerank(**kwargs):
+        raise RuntimeError("re-ranker unavailable")
+
+    monkeypatch.setattr(search, "get_embedding", fake_embedding)
+    monkeypatch.setattr(search, "search_vectors", fake_search_vectors)
+    monkeypatch.setattr(search, "re_rank_results", failing_rerank)
+    query_cache.clear()
+    yield
+    query_cache.clear()
+
+
+def test_search_response_shape(client, stub_search):
+    response = client.post("/api/search", json={"query": "solar", "limit": 5})
+    assert response.status_code == 200
+
+    body = response.json()
+    assert set(body) == {"results", "query_time_ms", "total_found"}
+    assert body["total_found"] == 1
+    assert body["results"] == [
+        {
+            "id": "a",
+            "text": "solar power",
+            "score": 0.9,
+            "metadata": {"file_name": "energy.pdf"},
+        }
+    ]
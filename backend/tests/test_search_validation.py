@@ -1,3 +1,14 @@
 def test_search_empty_query(client):
     response = client.post("/api/search", json={"query": ""})
     assert response.status_code == 400
+
+
+def test_search_rejects_overlong_query(client):
+    response = client.post("/api/search", json={"query": "x" * 5000})
+    assert response.status_code == 422
+
+
+def test_search_rejects_out_of_range_ef(client):
+    for ef in (0, -5, 100_000):
+        response = client.post("/api/search", json={"query": "hello", "ef": ef})
+        assert response.status_code == 422
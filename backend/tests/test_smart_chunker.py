@@ -0,0 +1,154 @@
+from utils.smart_chunker import (
+    ChunkConfig,
+    SmartChunker,
+    _merge_segments,
+    _split_segments,
+)
+
+
+def _words(n: int, start: int = 0) -> list[str]:
+    """Distinct all-letter words, so chunks pass the quality filters."""
+    words = []
+    for i in range(start + 26**2, start + 26**2 + n):
+        word = ""
+        while i:
+            i, r = divmod(i, 26)
+            word = chr(ord("a") + r) + word
+        words.append(word)
+    return words
+
+
+def _sentence(n: int, start: int = 0) -> str:
+    return " ".join(_words(n, start)) + "."
+
+
+def test_split_cascades_from_paragraphs_to_words():
+    long_line = " ".join([_sentence(4), _sentence(4, 4), _sentence(9, 8)])
+    text = "\n\n".join([_sentence(3, 100), f"{_sentence(3, 200)}\n{long_line}"])
+
+    segments = _split_segments(text, max_words=5)
+
+    assert "".join(segments) == text  # Separators stay on their segments
+    assert all(len(segment.split()) <= 5 for segment in segments)
+    assert segments[0] == _sentence(3, 100) + "\n\n"  # Short paragraph intact
+    assert segments[1] == _sentence(3, 200) + "\n"  # Line of a long paragraph
+    assert segments[2] == _sentence(4) + " "  # Sentence of a long line
+    assert segments[4:] == [word + " " for word in _words(8, 8)] + [
+        _words(1, 16)[0] + "."
+    ]  # Words of a long sentence
+
+
+def test_split_keeps_an_unsplittable_run_whole():
+    run = "\t".join(_words(20))  # No separator to split on
+    assert _split_segments(run, max_words=5) == [run]
+    assert _split_segments(f"{_sentence(2)} {run}", max_words=5)[-1] == run
+
+
+def test_merge_carries_overlap_into_next_chunk():
+    words = _words(10)
+    segments = [word + " " for word in words]
+
+    chunks = _merge_segments(segments, [1] * len(words), max_words=4, overlap=2)
+
+    assert chunks[0].split() == words[:4]
+    for previous, chunk in zip(chunks, chunks[1:]):
+        assert len(chunk.split()) <= 4
+        assert chunk.split()[:2] == previous.split()[-2:]
+    assert chunks[-1].split()[-1] == words[-1]
+
+
+def test_merge_without_overlap_covers_each_segment_once():
+    segments = [_sentence(3, i * 3) + " " for i in range(5)]
+    chunks = _merge_segments(segments, [3] * 5, max_words=6, overlap=0)
+    assert "".join(chunks) == "".join(segments)
+
+
+def test_empty_and_whitespace_only_documents_have_no_chunks():
+    chunker = SmartChunker(ChunkConfig(min_chunk_size=1))
+    assert chunker.chunk_document("") == []
+    assert chunker.chunk_document(" \n\n\t \n ") == []
+
+
+def test_chunk_document_respects_target_and_indexes_chunks():
+    text = "\n\n".join(_sentence(12, i * 12) for i in range(6))
+    config = ChunkConfig(target_chunk_size=30, min_chunk_size=5, overlap_size=12)
+
+    chunks = SmartChunker(config).chunk_document(text, "doc.txt")
+
+    assert len(chunks) > 1
+    for i, chunk in enumerate(chunks):
+        assert chunk["metadata"]["chunk_index"] == i
+        assert chunk["metadata"]["document_name"] == "doc.txt"
+        assert chunk["metadata"]["word_count"] == len(chunk["text"].split()) <= 30
+    # overlap_size=12 carries the previous chunk's last 12-word sentence over
+    assert chunks[1]["text"].startswith(_sentence(12, 12))
+
+
+def test_chunk_document_splits_on_blank_line_paragraphs():
+    # Three paragraphs of two 4-word sentences; with target 20 a sentence-level
+    # cut would put half of the third paragraph in the first chunk
+    paragraphs = [f"{_sentence(4, i * 8)} {_sentence(4, i * 8 + 4)}" for i in range(3)]
+    text = "\n\n".join(paragraphs).replace("\n\n", "\n \n\n", 1)
+    config = ChunkConfig(target_chunk_size=20, min_chunk_size=5, overlap_size=0)
+
+    chunks = SmartChunker(config).chunk_document(text)
+
+    assert [chunk["text"] for chunk in chunks] == [
+        "\n\n".join(paragraphs[:2]),
+        paragraphs[2],
+    ]
+
+
+def test_min_chunk_size_drops_short_chunks():
+    config = ChunkConfig(target_chunk_size=10, min_chunk_size=8, overlap_size=0)
+    text = f"{_sentence(10)}\n\n{_sentence(5, 10)}"
+
+    chunks = SmartChunker(config).chunk_document(text)
+
+    assert [chunk["text"] for chunk in chunks] == [_sentence(10)]
+
+
+def test_length_precheck_admits_chunks_of_exactly_min_words(monkeypatch):
+    # n one-letter words take 2n - 1 characters, the shortest text that can
+    # hold n words; the precheck must not reject it
+    chunker = SmartChunker(ChunkConfig(target_chunk_size=10, min_chunk_size=5))
+    monkeypatch.setattr(chunker, "_is_meaningful_text", lambda text, words: True)
+
+    assert [c["text"] for c in chunker.chunk_document("a b c d e")] == ["a b c d e"]
+    assert chunker.chunk_document("a b c d") == []
+    assert chunker.chunk_document("ab cd ef gh") == []  # Long enough, 4 words
+
+
+def _chunk_type(text: str) -> str:
+    return SmartChunker()._classify_chunk_type(text, len(text.split()))
+
+
+def test_hyphenated_words_are_not_list_items():
+    text = "A well-known long-term plan uses state-of-the-art tools - and more words."
+    assert _chunk_type(text) == "single_sentence"
+    assert _chunk_type("-\tfirst line of a section\nsecond line") == "list_item"
+    assert _chunk_type("1.5 million readers subscribed to the paper in 2020") != (
+        "list_item"
+    )
+
+
+def test_line_leading_markers_are_list_items():
+    assert _chunk_type("- first item\n- second item") == "list_item"
+    assert _chunk_type("1. first step\n2. second step") == "list_item"
+    assert _chunk_type("* starred item") == "list_item"
+    assert _chunk_type("Steps to follow today:\n  12. indented step") == "list_item"
+
+
+def test_short_title_case_text_is_a_heading():
+    assert _chunk_type("Quarterly Results Overview") == "heading"
+    assert _chunk_type("the quarterly results overview") == "single_sentence"
+    # Ten words or more is body text even with capitalized words
+    assert _chunk_type("Quarterly Results " + " ".join(["word"] * 8)) == (
+        "single_sentence"
+    )
+
+
+def test_sentence_count_separates_paragraphs_from_passages():
+    sentences = [f"{_sentence(4, i * 4)[:-1].capitalize()}." for i in range(6)]
+    assert _chunk_type(" ".join(sentences[:3])) == "standard_paragraph"
+    assert _chunk_type(" ".join(sentences)) == "long_passage"
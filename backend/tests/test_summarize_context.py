@@ -0,0 +1,35 @@
+from models.search import SearchResult
+from routes import summarize
+
+
+class _ByteEncoding:
+    """Stand-in tokenizer: one token per UTF-8 byte, the worst case."""
+
+    def encode_ordinary(self, text: str) -> list[int]:
+        return list(text.encode())
+
+
+def _result(text: str, score: float) -> SearchResult:
+    return SearchResult(id=text[:8], text=text, score=score, metadata={})
+
+
+def test_non_ascii_context_is_counted_in_tokens(monkeypatch):
+    settings = summarize.settings.model_copy(update={"SUMMARY_CONTEXT_TOKENS": 40})
+    monkeypatch.setattr(summarize, "settings", settings)
+    monkeypatch.setattr(summarize, "get_chat_encoding", lambda: _ByteEncoding())
+    # 20 characters in total, under the budget, but 60 bytes
+    results = [
+        _result("日本語のテキスト", 0.5),
+        _result("検索結果の要約です。本文", 0.9),
+    ]
+
+    assert summarize._fit_context(results) == ["検索結果の要約です。本文"]
+
+
+def test_context_that_fits_skips_the_tokenizer(monkeypatch):
+    def no_tokenizer():
+        raise AssertionError("tokenizer loaded")
+
+    monkeypatch.setattr(summarize, "get_chat_encoding", no_tokenizer)
+    results = [_result("short text", 0.5)]
+    assert summarize._fit_context(results) == ["short text"]
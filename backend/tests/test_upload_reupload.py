@@ -0,0 +1,43 @@
+import asyncio
+import numpy as np
+import pytest
+from qdrant_client import AsyncQdrantClient
+from routes import upload
+from services.idf_store import IdfStore
+from services.qdrant_service import create_collection
+
+
+def _document() -> bytes:
+    words = [f"word{chr(97 + i % 26)}{chr(97 + i // 26 % 26)}" for i in range(600)]
+    paragraphs = [" ".join(words[i : i + 100]) + "." for i in range(0, 600, 100)]
+    return "\n\n".join(paragraphs).encode()
+
+
+@pytest.fixture
+def qdrant(monkeypatch):
+    qdrant = AsyncQdrantClient(":memory:")
+    collection = upload.settings.QDRANT_COLLECTION_NAME
+    asyncio.run(create_collection(qdrant, collection, vector_size=4))
+    monkeypatch.setattr(upload, "client", qdrant)
+    return qdrant
+
+
+def test_reupload_skips_stored_chunks(client, qdrant, monkeypatch):
+    embedded = []
+
+    async def fake_embed_chunks(chunks, qdrant=None):
+        embedded.extend(chunks)
+        return [{"chunk": c, "embedding": np.ones(4, np.float32)} for c in chunks]
+
+    monkeypatch.setattr(upload, "embed_chunks", fake_embed_chunks)
+    monkeypatch.setattr(upload, "idf_store", IdfStore())
+    files = {"file": ("doc.txt", _document(), "text/plain")}
+
+    first = client.post("/api/upload", files=files)
+    first_embedded = len(embedded)
+    second = client.post("/api/upload", files=files)
+
+    assert first.status_code == second.status_code == 200
+    assert first_embedded == first.json()["chunks_count"] > 0
+    assert len(embedded) == first_embedded  # Nothing re-embedded
+    assert upload.idf_store.n_docs == first_embedded  # Counted once
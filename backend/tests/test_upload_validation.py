@@ -0,0 +1,42 @@
+import io
+import pytest
+from fastapi import UploadFile
+from routes import upload
+
+
+@pytest.fixture(autouse=True)
+def no_qdrant(monkeypatch):
+    async def ensure_collection_exists():
+        pass
+
+    monkeypatch.setattr(upload, "ensure_collection_exists", ensure_collection_exists)
+
+
+def _upload(client, content: bytes, content_type: str = "text/plain"):
+    return client.post(
+        "/api/upload", files={"file": ("doc.txt", content, content_type)}
+    )
+
+
+def test_upload_rejects_oversize_file(client, monkeypatch):
+    monkeypatch.setattr(upload, "MAX_FILE_SIZE", 10)
+    response = _upload(client, b"x" * 11)
+    assert response.status_code == 413
+
+
+def test_upload_size_without_declared_size():
+    file = UploadFile(io.BytesIO(b"x" * 11))
+    assert upload._upload_size(file) == 11
+    assert file.file.tell() == 0
+
+
+def test_upload_rejects_empty_file(client):
+    response = _upload(client, b"")
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Empty file uploaded"
+
+
+def test_upload_rejects_unsupported_type(client):
+    response = _upload(client, b"<html></html>", "text/html")
+    assert response.status_code == 400
+    assert "Unsupported file type" in response.json()["detail"]
@@ -18,6 +18,28 @@ from exceptions import (
     SummaryGenerationError,
 )
 
+# Exception class -> (status code, detail prefix). Looked up along the
+# raised type's MRO, so subclasses resolve to their nearest listed ancestor.
+_EXCEPTION_RESPONSES: dict[type[Exception], tuple[int, str]] = {
+    # Client errors (4xx)
+    FileTooLargeError: (400, ""),
+    EmptyFileError: (400, ""),
+    UnsupportedFileTypeError: (400, ""),
+    FileExtractionError: (400, ""),
+    InvalidQueryError: (400, ""),
+    # Server errors (5xx)
+    EmbeddingGenerationError: (500, "Embedding service error: "),
+    EmbeddingServiceError: (500, "Embedding service error: "),
+    VectorSearchError: (500, "Database error: "),
+    QdrantServiceError: (500, "Database error: "),
+    OpenAIServiceError: (500, "AI service error: "),
+    RustServiceError: (500, "Ranking service error: "),
+    SummarizationError: (500, "Summarization error: "),
+    SummaryGenerationError: (500, "Summarization error: "),
+    # Generic custom exceptions
+    QdrantSearchError: (500, "Application error: "),
+}
+
 
 def handle_custom_exception(e: Exception) -> HTTPException:
     """
@@ -29,34 +51,11 @@ def handle_custom_exception(e: Exception) -> HTTPException:
     Returns:
         HTTPException with appropriate status code and message
     """
-    # Client errors (4xx)
-    if isinstance(e, (FileTooLargeError, EmptyFileError, UnsupportedFileTypeError)):
-        return HTTPException(status_code=400, detail=str(e))
-
-    if isinstance(e, (FileExtractionError, InvalidQueryError)):
-        return HTTPException(status_code=400, detail=str(e))
-
-    # Server errors (5xx)
-    if isinstance(e, (EmbeddingGenerationError, EmbeddingServiceError)):
-        return HTTPException(
-            status_code=500, detail=f"Embedding service error: {str(e)}"
-        )
-
-    if isinstance(e, (VectorSearchError, QdrantServiceError)):
-        return HTTPException(status_code=500, detail=f"Database error: {str(e)}")
-
-    if isinstance(e, OpenAIServiceError):
-        return HTTPException(status_code=500, detail=f"AI service error: {str(e)}")
-
-    if isinstance(e, RustServiceError):
-        return HTTPException(status_code=500, detail=f"Ranking service error: {str(e)}")
-
-    if isinstance(e, (SummarizationError, SummaryGenerationError)):
-        return HTTPException(status_code=500, detail=f"Summarization error: {str(e)}")
-
-    # Generic custom exceptions
-    if isinstance(e, QdrantSearchError):
-        return HTTPException(status_code=500, detail=f"Application error: {str(e)}")
+    for cls in type(e).__mro__:
+        response = _EXCEPTION_RESPONSES.get(cls)
+        if response is not None:
+            status_code, prefix = response
+            return HTTPException(status_code=status_code, detail=f"{prefix}{e}")
 
     # Unknown exceptions
     return HTTPException(status_code=500, detail="Internal server error")
@@ -1,48 +1,65 @@
-import io
+from typing import BinaryIO, Callable
+import pymupdf
 import pdfplumber
 from docx import Document
 from exceptions import UnsupportedFileTypeError, FileExtractionError
+from utils.logging_config import logger
 
 
-def extract_text_from_pdf(file_bytes: bytes) -> str:
+def _extract_pdf_with_pymupdf(file: BinaryIO) -> str:
+    with pymupdf.open(stream=file.read(), filetype="pdf") as doc:
+        return "\n".join(page.get_text("text") for page in doc).strip()
+
+
+def _extract_pdf_with_pdfplumber(file: BinaryIO) -> str:
+    with pdfplumber.open(file) as pdf:
+        # Scanned pages have no text layer and return None
+        text = "\n".join(page.extract_text() or "" for page in pdf.pages)
+    return text.strip()
+
+
+def extract_text_from_pdf(file: BinaryIO) -> str:
+    # PyMuPDF is a C binding and much faster; pdfplumber is the fallback for
+    # files MuPDF can't parse
     try:
-        text = ""
-        with pdfplumber.open(io.BytesIO(file_bytes)) as pdf:
-            for page in pdf.pages:
-                text += page.extract_text() + "\n"
-        return text.strip()
+        return _extract_pdf_with_pymupdf(file)
+    except Exception as e:
+        logger.warning(f"PyMuPDF extraction failed, falling back to pdfplumber: {e}")
+
+    try:
+        file.seek(0)
+        return _extract_pdf_with_pdfplumber(file)
     except Exception as e:
         raise FileExtractionError(f"Failed to extract text from PDF: {str(e)}")
 
 
-def extract_text_from_txt(file_bytes: bytes) -> str:
+def extract_text_from_txt(file: BinaryIO) -> str:
     try:
-        return file_bytes.decode("utf-8", errors="ignore").strip()
+        return file.read().decode("utf-8", errors="ignore").strip()
     except Exception as e:
         raise FileExtractionError(f"Failed to extract text from TXT: {str(e)}")
 
 
-def extract_text_from_docx(file_bytes: bytes) -> str:
+def extract_text_from_docx(file: BinaryIO) -> str:
     try:
-        text = ""
-        file_stream = io.BytesIO(file_bytes)
-        doc = Document(file_stream)
-        for para in doc.paragraphs:
-            text += para.text + "\n"
-        return text.strip()
+        doc = Document(file)
+        return "\n".join(para.text for para in doc.paragraphs).strip()
     except Exception as e:
         raise FileExtractionError(f"Failed to extract text from DOCX: {str(e)}")
 
 
-def extract_text(file_bytes: bytes, content_type: str) -> str:
-    if content_type == "application/pdf":
-        return extract_text_from_pdf(file_bytes)
-    elif content_type == "text/plain":
-        return extract_text_from_txt(file_bytes)
-    elif (
-        content_type
-        == "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-    ):
-        return extract_text_from_docx(file_bytes)
-    else:
+_EXTRACTORS: dict[str, Callable[[BinaryIO], str]] = {
+    "application/pdf": extract_text_from_pdf,
+    "text/plain": extract_text_from_txt,
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document": (
+        extract_text_from_docx
+    ),
+}
+
+
+def extract_text(file: BinaryIO, content_type: str) -> str:
+    """Extract text from a binary file object positioned at its start."""
+    extractor = _EXTRACTORS.get(content_type)
+    if extractor is None:
         raise UnsupportedFileTypeError(f"Unsupported file type: {content_type}")
+    return extractor(file)
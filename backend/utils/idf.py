@@ -1,5 +1,5 @@
-import math
-from collections import defaultdict
+from collections import Counter
+import numpy as np
 
 
 # Replace later TF-IDF from scikit-learn
@@ -12,12 +12,11 @@ def compute_idf(documents):
     in search and ranking algorithms, and is a key part of TF-IDF and BM25 scoring.
     """
     N = len(documents)
-    df = defaultdict(int)
+    # Counter.update counts each document's distinct terms in C
+    df = Counter()
     for doc in documents:
-        words = set(doc.lower().split())
-        for w in words:
-            df[w] += 1
-    idf = {}
-    for term, freq in df.items():
-        idf[term] = math.log((N + 1) / (freq + 1)) + 1
-    return idf
+        df.update(set(doc.lower().split()))
+    # One vectorized log over all document frequencies
+    freqs = np.fromiter(df.values(), dtype=np.float64, count=len(df))
+    idf = np.log((N + 1) / (freqs + 1)) + 1
+    return dict(zip(df.keys(), idf.tolist()))
@@ -1,8 +1,37 @@
+import functools
 import logging
 import sys
-import json
 import os
-from datetime import datetime
+from datetime import datetime, timezone
+import orjson
+
+# Standard LogRecord attributes; anything else on a record is an extra field
+_EXCLUDED_KEYS = frozenset(
+    {
+        "name",
+        "msg",
+        "args",
+        "levelname",
+        "levelno",
+        "pathname",
+        "filename",
+        "module",
+        "lineno",
+        "funcName",
+        "created",
+        "msecs",
+        "relativeCreated",
+        "thread",
+        "threadName",
+        "processName",
+        "process",
+        "exc_info",
+        "exc_text",
+        "stack_info",
+    }
+)
+# Use JSON formatting in Kubernetes (for Loki), regular formatting otherwise
+_JSON_LOGS = bool(os.getenv("KUBERNETES_SERVICE_HOST"))
 
 
 class JSONFormatter(logging.Formatter):
@@ -10,7 +39,7 @@ class JSONFormatter(logging.Formatter):
 
     def format(self, record):
         log_entry = {
-            "timestamp": datetime.fromtimestamp(record.created).isoformat() + "Z",
+            "timestamp": datetime.fromtimestamp(record.created, tz=timezone.utc),
             "level": record.levelname,
             "logger": record.name,
             "message": record.getMessage(),
@@ -25,42 +54,25 @@ class JSONFormatter(logging.Formatter):
             log_entry["exception"] = self.formatException(record.exc_info)
 
         # Add any extra fields from the log record
-        excluded_keys = [
-            "name",
-            "msg",
-            "args",
-            "levelname",
-            "levelno",
-            "pathname",
-            "filename",
-            "module",
-            "lineno",
-            "funcName",
-            "created",
-            "msecs",
-            "relativeCreated",
-            "thread",
-            "threadName",
-            "processName",
-            "process",
-            "exc_info",
-            "exc_text",
-            "stack_info",
-        ]
-        for key, value in record.__dict__.items():
-            if key not in excluded_keys:
-                log_entry[key] = value
+        log_entry.update(
+            {
+                key: value
+                for key, value in record.__dict__.items()
+                if key not in _EXCLUDED_KEYS
+            }
+        )
 
-        return json.dumps(log_entry)
+        # orjson writes the UTC datetime as ISO 8601 with a Z suffix
+        return orjson.dumps(log_entry, option=orjson.OPT_UTC_Z).decode()
 
 
+@functools.lru_cache(maxsize=16)
 def configure_logger(name: str = "qdrant_search") -> logging.Logger:
     logger = logging.getLogger(name)
     if not logger.handlers:
         handler = logging.StreamHandler(sys.stdout)
 
-        # Use JSON formatting if in Kubernetes environment, regular formatting otherwise
-        if os.getenv("KUBERNETES_SERVICE_HOST"):
+        if _JSON_LOGS:
             formatter = JSONFormatter()
         else:
             formatter = logging.Formatter(
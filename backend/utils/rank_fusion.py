@@ -0,0 +1,18 @@
+def reciprocal_rank_fusion(result_lists: list[list[dict]], k: int = 60) -> list[dict]:
+    """
+    Merge several ranked result lists with Reciprocal Rank Fusion.
+
+    Each hit scores sum(1 / (k + rank)) over the lists it appears in, which
+    rewards documents that several query variants agree on. Output is ordered
+    by that fused score, but each hit keeps its best vector similarity as
+    "score" so downstream thresholds and re-ranking still see cosine scores.
+    """
+    fused: dict[str, float] = {}
+    best: dict[str, dict] = {}
+    for results in result_lists:
+        for rank, result in enumerate(results, 1):
+            key = str(result["id"])
+            fused[key] = fused.get(key, 0.0) + 1.0 / (k + rank)
+            if key not in best or result["score"] > best[key]["score"]:
+                best[key] = result
+    return [best[key] for key in sorted(fused, key=fused.__getitem__, reverse=True)]
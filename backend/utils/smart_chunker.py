@@ -1,115 +1,137 @@
 """
-Modern semantic chunking using established libraries.
+Semantic chunking with a split-then-merge splitter.
 
-This implementation uses:
-- LangChain RecursiveCharacterTextSplitter for intelligent text splitting
-- NLTK for sentence tokenization and text processing
-- spaCy for advanced document structure analysis
+Documents are split on a paragraph -> line -> sentence -> word separator
+cascade until every segment is under the target size, then adjacent
+segments are merged back up to the target with a word overlap.
 """
 
-from typing import List, Optional
+from typing import List, Optional, Sequence, Tuple
+from collections import deque
 from dataclasses import dataclass
+import functools
 import re
 import unicodedata
 
 # Library imports
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-import nltk
-import spacy
-
-
-@dataclass
+import numpy as np
+
+# Common OCR word splits, fixed by one alternation and a lookup
+_OCR_FIX_MAP = {
+    "offi ce": "office",
+    "the m": "them",
+    "with in": "within",
+    "over all": "overall",
+    "fl ying": "flying",
+    "fi ve": "five",
+    "fi eld": "field",
+    "fi nalising": "finalising",
+}
+_OCR_FIX_RE = re.compile(r"\b(" + "|".join(map(re.escape, _OCR_FIX_MAP)) + r")\b")
+# Runs of whitespace other than newlines, so paragraph and line breaks reach
+# the separator cascade
+_MULTISPACE_RE = re.compile(r"[^\S\n]{2,}")
+_MISSING_SPACE_RE = re.compile(r"([a-z])([A-Z])")  # Missing spaces between words
+_HORIZONTAL_SPACE_RE = re.compile(r"[ \t]+")
+_PARAGRAPH_BREAK_RE = re.compile(r"\n(?:[ \t]*\n)+")  # One or more blank lines
+
+# Chunk classification: a line opening with a bullet or "1." marker, and
+# sentence-ending punctuation followed by more text
+_LIST_ITEM_RE = re.compile(r"^\s*(?:[•*\-]|\d+\.)\s", re.MULTILINE)
+_SENTENCE_BOUNDARY_RE = re.compile(r"[.!?]+[\"')\]]*\s+(?=\S)")
+
+# C0/C1 control characters other than tab and newline
+_CONTROL_CHARS = dict.fromkeys(
+    [*range(0x00, 0x09), *range(0x0B, 0x20), *range(0x7F, 0xA0)]
+)
+
+
+def _strip_control_chars(text: str) -> str:
+    """Drop non-printable characters except newlines and tabs."""
+    text = text.translate(_CONTROL_CHARS)
+    if text.replace("\n", "").replace("\t", "").isprintable():
+        return text
+    # Rare: other non-printables (zero-width or format characters) remain
+    return "".join(char for char in text if char.isprintable() or char in "\n\t")
+
+
+def _alpha_count(text: str) -> int:
+    """Count alphabetic characters, in one numpy pass for ASCII text."""
+    if not text.isascii():
+        return sum(map(str.isalpha, text))
+    # Fold case by setting bit 0x20, then test the a-z range
+    folded = np.frombuffer(text.encode("ascii"), dtype=np.uint8) | 0x20
+    return int(np.count_nonzero((folded >= ord("a")) & (folded <= ord("z"))))
+
+
+# Split points from coarsest to finest; each stays attached to the
+# segment before it, so joining segments reproduces the text exactly
+_SEPARATORS = ("\n\n", "\n", ". ", "! ", "? ", " ")
+
+
+def _split_segments(
+    text: str, max_words: int, separators: Sequence[str] = _SEPARATORS
+) -> List[str]:
+    """Split text on the separator cascade until no segment exceeds max_words."""
+    if len(text.split()) <= max_words:
+        return [text]
+    for level, separator in enumerate(separators):
+        if separator not in text:
+            continue
+        parts = text.split(separator)
+        segments = []
+        for part in [part + separator for part in parts[:-1]] + parts[-1:]:
+            if part:
+                segments.extend(
+                    _split_segments(part, max_words, separators[level + 1 :])
+                )
+        return segments
+    # A single word longer than the target; nothing left to split on
+    return [text]
+
+
+def _merge_segments(
+    segments: List[str], word_counts: List[int], max_words: int, overlap: int
+) -> List[str]:
+    """
+    Greedily merge adjacent segments up to max_words. Each new chunk starts
+    with the trailing segments of the previous one, up to overlap words.
+    """
+    chunks = []
+    window: deque[int] = deque()
+    window_words = 0
+    for i, count in enumerate(word_counts):
+        if window and window_words + count > max_words:
+            chunks.append("".join(segments[j] for j in window))
+            while window and (
+                window_words > overlap or window_words + count > max_words
+            ):
+                window_words -= word_counts[window.popleft()]
+        window.append(i)
+        window_words += count
+    if window:
+        chunks.append("".join(segments[j] for j in window))
+    return chunks
+
+
+@dataclass(slots=True, frozen=True)
 class ChunkConfig:
     """Configuration for chunking behavior"""
 
-    target_chunk_size: int = 300  # Target words per chunk
+    # Words per chunk; segments are merged up to this and never past it, since
+    # the separator cascade ends at single words
+    target_chunk_size: int = 300
     min_chunk_size: int = 100  # Minimum words to avoid tiny fragments
-    max_chunk_size: int = 500  # Maximum words before force-splitting
     overlap_size: int = 50  # Words of overlap between chunks
-    preserve_paragraphs: bool = True  # Try to keep paragraphs intact
-    sentence_aware: bool = True  # Split at sentence boundaries
 
 
 class SmartChunker:
     def __init__(self, config: Optional[ChunkConfig] = None):
         self.config = config or ChunkConfig()
 
-        # Setup NLTK
-        try:
-            nltk.data.find("tokenizers/punkt")
-        except LookupError:
-            nltk.download("punkt")
-
-        # Setup spaCy
-        try:
-            self.nlp = spacy.load("en_core_web_sm")
-        except OSError:
-            # Download the model if not available
-            import subprocess
-
-            subprocess.run(["python", "-m", "spacy", "download", "en_core_web_sm"])
-            self.nlp = spacy.load("en_core_web_sm")
-
-        # OCR artifact patterns to clean
-        self.ocr_fixes = [
-            (r"\boffi ce\b", "office"),
-            (r"\bthe m\b", "them"),
-            (r"\bwith in\b", "within"),
-            (r"\bover all\b", "overall"),
-            (r"\bfl ying\b", "flying"),
-            (r"\bfi ve\b", "five"),
-            (r"\bfi eld\b", "field"),
-            (r"\bfi nalising\b", "finalising"),
-            (r"\s{2,}", " "),  # Multiple spaces
-            (r"([a-z])([A-Z])", r"\1 \2"),  # Missing spaces between words
-        ]
-
-        # Create the LangChain text splitter
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=self.config.target_chunk_size * 6,
-            chunk_overlap=self.config.overlap_size * 6,
-            separators=["\n\n", "\n", ". ", "! ", "? ", " ", ""],
-        )
-
     def chunk_document(self, text: str, document_name: str = "document") -> List[dict]:
-        # Step 1: Clean OCR artifacts
-        cleaned_text = self._preprocess_text(text)
-
-        # Step 2: Use spaCy for better text preprocessing
-        doc = self.nlp(cleaned_text)
-
-        # Use spaCy's sentence segmentation for cleaner text
-        sentences = [sent.text.strip() for sent in doc.sents if sent.text.strip()]
-        processed_text = " ".join(sentences)
-
-        # Step 3: Use LangChain to split the cleaned text
-        chunks = self.text_splitter.split_text(processed_text)
-
-        # Step 4: Clean up chunks (remove leading separators)
-        cleaned_chunks = []
-        for chunk in chunks:
-            # Remove leading punctuation and whitespace
-            cleaned_chunk = chunk.lstrip(". !?").strip()
-            if cleaned_chunk:  # Only keep non-empty chunks
-                cleaned_chunks.append(cleaned_chunk)
-
-        # Step 5: Apply quality filtering
         result = []
-        for i, chunk in enumerate(cleaned_chunks):
-            # Quality check - only keep meaningful chunks
-            if not self._is_meaningful_text(chunk):
-                continue
-
-            word_count = len(chunk.split())
-
-            # Skip chunks that are too small
-            if word_count < self.config.min_chunk_size:
-                continue
-
-            # Use spaCy to analyze chunk type
-            chunk_doc = self.nlp(chunk)
-            chunk_type = self._classify_chunk_type(chunk_doc)
-
+        for i, chunk, word_count in self._select_chunks(text):
             result.append(
                 {
                     "text": chunk,
@@ -118,43 +140,87 @@ class SmartChunker:
                         "chunk_index": i,
                         "word_count": word_count,
                         "char_count": len(chunk),
-                        "chunk_type": chunk_type,
+                        "chunk_type": self._classify_chunk_type(chunk, word_count),
                     },
                 }
             )
 
         return result
 
+    def chunk_documents(
+        self, texts: List[str], document_names: Optional[List[str]] = None
+    ) -> List[List[dict]]:
+        """Chunk several documents with this chunker's shared setup."""
+        document_names = document_names or ["document"] * len(texts)
+        return [
+            self.chunk_document(text, document_name)
+            for text, document_name in zip(texts, document_names)
+        ]
+
+    def _select_chunks(self, text: str) -> List[Tuple[int, str, int]]:
+        """Split a document and return (chunk_index, text, word_count) to keep."""
+        # Step 1: Clean OCR artifacts
+        cleaned_text = self._preprocess_text(text)
+
+        # Step 2: Split on paragraph, line, sentence and word boundaries,
+        # then merge the segments back up to the target size
+        target = self.config.target_chunk_size
+        segments = _split_segments(cleaned_text, target)
+        word_counts = [len(segment.split()) for segment in segments]
+        chunks = _merge_segments(
+            segments, word_counts, target, self.config.overlap_size
+        )
+
+        # Step 3: Clean up chunks (remove leading separators)
+        cleaned_chunks = []
+        for chunk in chunks:
+            # Remove leading punctuation and whitespace
+            cleaned_chunk = chunk.lstrip(". !?").strip()
+            if cleaned_chunk:  # Only keep non-empty chunks
+                cleaned_chunks.append(cleaned_chunk)
+
+        # Step 4: Apply quality filtering, splitting each chunk into words once
+        min_words = self.config.min_chunk_size
+        kept = []
+        for i, chunk in enumerate(cleaned_chunks):
+            # n words need at least 2n - 1 characters; skip the split when
+            # the chunk is too short to reach the minimum
+            if len(chunk) < 2 * min_words - 1:
+                continue
+            words = chunk.split()
+            # Quality check - only keep meaningful chunks that aren't too small
+            if len(words) >= min_words and self._is_meaningful_text(chunk, words):
+                kept.append((i, chunk, len(words)))
+        return kept
+
     def _preprocess_text(self, text: str) -> str:
         """Clean text while preserving document structure (from original code)."""
-        # Unicode normalization
-        text = unicodedata.normalize("NFKC", text)
+        # Unicode normalization; ASCII text is already NFKC
+        if not text.isascii():
+            text = unicodedata.normalize("NFKC", text)
 
         # Fix common OCR artifacts
-        for pattern, replacement in self.ocr_fixes:
-            text = re.sub(pattern, replacement, text)
+        text = _OCR_FIX_RE.sub(lambda m: _OCR_FIX_MAP[m.group(1)], text)
+        text = _MULTISPACE_RE.sub(" ", text)
+        text = _MISSING_SPACE_RE.sub(r"\1 \2", text)
 
         # Remove control characters but preserve meaningful whitespace
-        text = "".join(char for char in text if char.isprintable() or char in "\n\t")
+        text = _strip_control_chars(text)
 
         # Normalize excessive whitespace but preserve paragraph breaks
-        text = re.sub(r"[ \t]+", " ", text)  # Multiple spaces/tabs → single space
-        text = re.sub(r"\n[ \t]*\n", "\n\n", text)  # Clean paragraph breaks
-        text = re.sub(r"\n{3,}", "\n\n", text)  # Max 2 newlines
+        text = _HORIZONTAL_SPACE_RE.sub(" ", text)  # Multiple spaces/tabs → single
+        text = _PARAGRAPH_BREAK_RE.sub("\n\n", text)  # Blank-line runs → one
 
         return text.strip()
 
-    def _is_meaningful_text(self, text: str) -> bool:
+    def _is_meaningful_text(self, text: str, words: List[str]) -> bool:
         """Check if text chunk has sufficient information content (from original)."""
-        words = text.split()
-
         # Quality filters
         if len(words) < 5:  # Too short
             return False
 
         # Check alphabetic content ratio
-        alpha_chars = sum(1 for c in text if c.isalpha())
-        if alpha_chars / len(text) < 0.6:  # Less than 60% letters
+        if _alpha_count(text) / len(text) < 0.6:  # Less than 60% letters
             return False
 
         # Check for repeated patterns (OCR artifacts)
@@ -163,33 +229,39 @@ class SmartChunker:
 
         return True
 
-    def _classify_chunk_type(self, doc) -> str:
-        """Use spaCy to classify chunk content type"""
-        text = doc.text
-
+    def _classify_chunk_type(self, text: str, word_count: int) -> str:
+        """Classify chunk content type from its text"""
         # Check for lists
-        if any(
-            token.text in ["•", "-", "*"] for token in doc
-        ) or text.strip().startswith(("1.", "2.", "3.")):
+        if _LIST_ITEM_RE.search(text):
             return "list_item"
 
         # Check for headers (all caps or short text)
-        if len(text.split()) < 10 and any(token.is_title for token in doc):
+        if word_count < 10 and any(word.istitle() for word in text.split()):
             return "heading"
 
         # Check sentence count
-        sentences = list(doc.sents)
-        if len(sentences) == 1:
+        sentence_count = len(_SENTENCE_BOUNDARY_RE.findall(text)) + 1
+        if sentence_count == 1:
             return "single_sentence"
-        elif len(sentences) > 5:
+        elif sentence_count > 5:
             return "long_passage"
         else:
             return "standard_paragraph"
 
 
+@functools.lru_cache(maxsize=8)
+def _cached_chunker(config: ChunkConfig) -> SmartChunker:
+    return SmartChunker(config)
+
+
+def get_chunker(config: Optional[ChunkConfig] = None) -> SmartChunker:
+    """Return a shared SmartChunker for this config, built on first use."""
+    return _cached_chunker(config or ChunkConfig())
+
+
 def smart_chunk_text(
     text: str, document_name: str = "document", config: Optional[ChunkConfig] = None
 ) -> List[str]:
-    chunker = SmartChunker(config)
+    chunker = get_chunker(config)
     chunk_data = chunker.chunk_document(text, document_name)
     return [chunk["text"] for chunk in chunk_data]
@@ -1,4 +1,8 @@
-use actix_web::{App, HttpResponse, HttpServer, Result, middleware::Logger, web};
+use actix_web::{
+    App, HttpResponse, HttpServer, Result,
+    middleware::{Compress, Logger},
+    web,
+};
 use prometheus::{Counter, Encoder, TextEncoder, register_counter};
 use std::sync::OnceLock;
 
@@ -49,6 +53,10 @@ async fn main() -> std::io::Result<()> {
         App::new()
             // Add request logging middleware
             .wrap(Logger::default())
+            // Compress responses for clients sending Accept-Encoding. gzip
+            // request bodies (Content-Encoding: gzip) are decoded by the JSON
+            // extractor itself via actix-web's default compress features.
+            .wrap(Compress::default())
             // Register routes
             .route("/health", web::get().to(handlers::health::health_check))
             .route("/re-rank", web::post().to(handlers::rerank::handle_rerank))
@@ -37,12 +37,13 @@ pub struct SearchResult {
     /// Similarity score (0.0 to 1.0)
     pub score: f64,
 
-    /// Additional metadata
+    /// Additional metadata; optional since callers may already hold it
+    #[serde(default)]
     pub metadata: ResultMetadata,
 }
 
 /// Metadata associated with a search result.
-#[derive(Debug, Clone, Deserialize, Serialize)]
+#[derive(Debug, Clone, Default, Deserialize, Serialize)]
 pub struct ResultMetadata {
     /// Original filename of the document
     pub file_name: String,
@@ -58,3 +59,13 @@ pub struct ResultMetadata {
     #[serde(skip_serializing_if = "Option::is_none")]
     pub section_title: Option<String>,
 }
+
+impl ResultMetadata {
+    /// True when no metadata was sent, so responses can omit it.
+    pub fn is_empty(&self) -> bool {
+        self.file_name.is_empty()
+            && self.content_type.is_empty()
+            && self.page_number.is_none()
+            && self.section_title.is_none()
+    }
+}
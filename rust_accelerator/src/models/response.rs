@@ -25,6 +25,7 @@ pub struct ReRankedResult {
     /// Enhanced score
     pub score: f64,
 
-    /// Metadata
+    /// Metadata, omitted when the request carried none
+    #[serde(skip_serializing_if = "ResultMetadata::is_empty")]
     pub metadata: ResultMetadata,
 }